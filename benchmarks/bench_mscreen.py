@@ -0,0 +1,307 @@
+"""
+Benchmarks of `mscreen` hot paths (update and draw), running headless.
+
+    python benchmarks/bench_mscreen.py             # compare against baseline
+    python benchmarks/bench_mscreen.py --save      # store a new baseline
+    python benchmarks/bench_mscreen.py --json out.json --threshold 0.5
+
+Every benchmark reports the best time per call (in seconds) of a few
+repeats. The results are printed as JSON (or written to `--json`) and
+compared against `baseline.json`, the script exits with an error if any
+benchmark got slower than the baseline by more than `--threshold` (a ratio,
+0.25 means 25%).
+
+Baselines are machine dependent, store a new one (`--save`) when running on
+a different machine.
+"""
+import os
+import sys
+import json
+import atexit
+import random
+import tempfile
+import timeit
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import mscreen  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "baseline.json")
+REPEAT = 5
+MIN_TIME = 0.05  # seconds per repeat (at least)
+
+# Benchmarks are registered as (name, setup) pairs, where `setup` returns the
+# function to be timed (so building the scene isn't part of the timing).
+_benchmarks = list()
+
+
+def benchmark(name):
+    def register(setup):
+        _benchmarks.append((name, setup))
+        return setup
+    return register
+
+
+def _scene():
+    # Headless scene manager drawing through a recording backend.
+    scene = mscreen.SceneManager()
+    scene.view = mscreen.HeadlessView()
+    scene.backend = mscreen.RecordingBackend()
+    return scene
+
+
+def _randomPoints(count, spread=50.0):
+    return [(random.uniform(-spread, spread), random.uniform(-spread, spread),
+             random.uniform(-spread, spread)) for i in range(count)]
+
+
+# === Interpolation ===
+
+@benchmark("bezierInterpolate/4")
+def bezierInterpolate4():
+    points = _randomPoints(4)
+    samples = [i / 99.0 for i in range(100)]
+    return lambda: [mscreen.bezierInterpolate(t, points) for t in samples]
+
+
+@benchmark("bezierInterpolate/16")
+def bezierInterpolate16():
+    points = _randomPoints(16)
+    samples = [i / 99.0 for i in range(100)]
+    return lambda: [mscreen.bezierInterpolate(t, points) for t in samples]
+
+
+# === Primitive updates ===
+
+def _curveUpdate(count, degree):
+    curve = mscreen.CurvePrim(_randomPoints(count), degree=degree)
+
+    def run():
+        curve.move(0.1, 0.0, 0.0)
+        curve.update()
+    return run
+
+
+for _count in (10, 100, 1000, 10000):
+    for _degree, _name in ((mscreen.CURVE_LINEAR, "linear"),
+                           (mscreen.CURVE_CATMULLROM, "catmullrom")):
+        benchmark("CurvePrim.update/{}/{}".format(_name, _count))(
+            lambda count=_count, degree=_degree: _curveUpdate(count, degree))
+
+
+@benchmark("CurvePrim.update/bezier/16")
+def bezierCurveUpdate():
+    return _curveUpdate(16, mscreen.CURVE_BEZIER)
+
+
+@benchmark("TransformPrim.update/1000")
+def transformUpdate():
+    view = mscreen.HeadlessView()
+    transforms = [mscreen.TransformPrim() for i in range(1000)]
+
+    def run():
+        for each in transforms:
+            each.move(0.1, 0.0, 0.0)
+            each.prepare(view)
+    return run
+
+
+@benchmark("ParticlePrim.step/100000")
+def particleStep():
+    particles = mscreen.ParticlePrim()
+    particles.addEmitter(mscreen.ParticleEmitter(rate=10000,
+                                                 spread=(1, 1, 1)))
+    particles.addForce(lambda positions, velocities, ages: (0, -0.1, 0))
+    particles.addForce(mscreen.bounceForce())
+    particles.setAgeLimit(10)
+    for i in range(10):
+        particles.step()  # steady state (100k particles)
+
+    def run():
+        particles.step()
+        particles.update()
+    return run
+
+
+# === Scene management ===
+
+@benchmark("SceneManager.register+erase/10000")
+def registerErase():
+    scene = _scene()
+    points = [mscreen.PointPrim((0, 0, 0)) for i in range(10000)]
+
+    def run():
+        for each in points:
+            scene.registerPrimitive(each)
+        for each in points:
+            scene.unregisterPrimitive(each)
+    return run
+
+
+@benchmark("SceneManager.register+bulkErase/10000")
+def registerBulkErase():
+    scene = _scene()
+    points = [mscreen.PointPrim((0, 0, 0)) for i in range(10000)]
+
+    def run():
+        for each in points:
+            scene.registerPrimitive(each)
+        scene.unregisterPrimitive(points)
+    return run
+
+
+@benchmark("SceneManager.load/1000000")
+def loadScene():
+    scene = _scene()
+    scene.registerPrimitive(mscreen.PointCloudPrim(
+        [(i, i, i) for i in range(1000000)]))
+    handle, path = tempfile.mkstemp(suffix=".msc")
+    os.close(handle)
+    scene.save(path)
+    atexit.register(os.remove, path)
+
+    def run():
+        scene.clear()
+        scene.load(path)
+    return run
+
+
+# === Drawing ===
+
+def _frame(count, profiled=False):
+    scene = _scene()
+    if profiled:
+        scene.enableProfiler()
+    for point in _randomPoints(count):
+        scene.registerPrimitive(mscreen.CurvePrim(
+            (point, (point[0], point[1] + 1, point[2]))))
+    scene.draw()  # first frame prepares everything
+
+    def run():
+        scene.draw()
+        scene.backend.clear()
+    return run
+
+
+for _count in (1000, 10000, 100000):
+    benchmark("SceneManager.draw/static/{}".format(_count))(
+        lambda count=_count: _frame(count))
+
+
+@benchmark("SceneManager.draw/static/10000/profiled")
+def profiledFrame():
+    return _frame(10000, profiled=True)
+
+
+@benchmark("SceneManager.draw/dynamic/1000")
+def dynamicFrame():
+    scene = _scene()
+    curves = [mscreen.CurvePrim((p, (p[0], p[1] + 1, p[2])))
+              for p in _randomPoints(1000)]
+    for each in curves:
+        scene.registerPrimitive(each)
+
+    def run():
+        for each in curves:
+            each.move(0.01, 0.0, 0.0)
+        scene.draw()
+        scene.backend.clear()
+    return run
+
+
+@benchmark("SceneManager.draw/dynamic/strips/100x1000")
+def dynamicStrips():
+    # long line strips merged again on every frame (one of them changes)
+    scene = _scene()
+    curves = [mscreen.CurvePrim(_randomPoints(1000)) for i in range(100)]
+    for each in curves:
+        scene.registerPrimitive(each)
+    scene.draw()
+
+    def run():
+        curves[0].move(0.01, 0.0, 0.0)
+        scene.draw()
+        scene.backend.clear()
+    return run
+
+
+# === Runner ===
+
+def run(pattern=None, repeat=REPEAT):
+    """
+    Runs the benchmarks whose name contains `pattern` (all if `None`),
+    returns a dictionary of name: seconds.
+    """
+    results = dict()
+    for name, setup in _benchmarks:
+        if pattern and pattern not in name:
+            continue
+        random.seed(0)
+        function = setup()
+        # fast benchmarks are called several times per repeat to get
+        # measurable (less noisy) timings
+        elapsed = max(timeit.timeit(function, number=1), 1e-9)
+        number = max(1, min(1000, int(MIN_TIME / elapsed)))
+        results[name] = min(timeit.repeat(
+            function, number=number, repeat=repeat)) / number
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns the benchmarks slower than `baseline` by more than `threshold`
+    as a list of (name, seconds, baseline seconds).
+    """
+    regressions = list()
+    for name, seconds in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference and seconds > reference * (1.0 + threshold):
+            regressions.append((name, seconds, reference))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split(
+        "\n")[0])
+    parser.add_argument("pattern", nargs="?", help="run matching only")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--json", help="write results to a file")
+    parser.add_argument("--save", action="store_true",
+                        help="store results as the new baseline")
+    options = parser.parse_args(args)
+
+    results = run(options.pattern, options.repeat)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if options.json:
+        with open(options.json, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if options.save:
+        baseline = dict()
+        if os.path.exists(options.baseline):
+            with open(options.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(options.baseline, "w") as f:
+            f.write(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        return 0
+
+    if not os.path.exists(options.baseline):
+        return 0
+    with open(options.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, options.threshold)
+    for name, seconds, reference in regressions:
+        sys.stderr.write("REGRESSION {}: {:.6f}s (baseline {:.6f}s)\n".format(
+            name, seconds, reference))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,19 +25,67 @@ For usage examples, take a look at the
 # === Technical Documentation ===
 
 import math
+import array
+import operator
+import itertools
+import collections
 import logging
+import weakref
+import time
+import random
+import os
+import json
+import mmap
+import struct
+import tempfile
+import io
+import socket
+import threading
+import functools
+import atexit
+import errno
+import ctypes
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 try:
     import maya
     import maya.cmds as mc
+    import maya.utils
+    import maya.OpenMaya as om
     import maya.OpenMayaUI as omui
     import maya.OpenMayaRender as omr
     import maya.api._OpenMaya_py2 as om2
+    HEADLESS = False
 except ImportError:
+    # Headless mode (i.e. plain Python), drawing is recorded and OpenMaya
+    # math types are replaced by pure Python stand-ins (see `Headless mode`).
+    maya = mc = om = omui = omr = om2 = None
+    HEADLESS = True
     logger.debug('Maya not found')
 
+# Python 3 compatibility (i.e. headless mode outside of Maya).
+try:
+    basestring
+except NameError:
+    basestring = str
+    xrange = range
+
+
+def _noViewport():
+    # There's no viewport to draw on (nor any UI to touch) in headless mode
+    # or when Maya runs in batch mode (i.e. mayapy), primitives are drawn
+    # straight away by a `RecordingBackend` instead.
+    return HEADLESS or mc.about(batch=True)
+
+# NumPy is optional, when available some of the heavy lifting (i.e. curve
+# tessellation) is done as batched array operations.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    logger.debug('NumPy not found')
+
 
 # == Constants ==
 
@@ -69,13 +117,62 @@ COLOR_LIGHTMAGENTA = (1.0, 0.25, 1.0)
 COLOR_LIGHTCYAN = (0.25, 1.0, 1.0)
 
 # Curve constants represent the type of interpolation/degree of curves.
+# `CURVE_BEZIER` is a single bezier curve of degree N-1 (N being the number of
+# control points), while the rest are piecewise curves made of cubic spans:
+# `CURVE_CUBIC_BEZIER` (spans of 4 control points sharing end points, so
+# 3n + 1 points are expected),
+# `CURVE_CATMULLROM` (passing through every control point) and `CURVE_BSPLINE`
+# (uniform b-spline, clamped at both ends).
 CURVE_LINEAR = 1
 CURVE_BEZIER = 3
+CURVE_CUBIC_BEZIER = 4
+CURVE_CATMULLROM = 5
+CURVE_BSPLINE = 6
+
+# Number of samples used to tessellate each span of a curve, adaptive
+# tessellation modes never go above `CURVE_MAX_SPAN_SAMPLES`.
+CURVE_SPAN_SAMPLES = 16
+CURVE_MAX_SPAN_SAMPLES = 64
+
+# Tessellation constants define how many samples are used on each span of a
+# curve: a fixed amount (`CURVE_SPAN_SAMPLES`), as many as needed to keep
+# the curve within a distance `tolerance` (world units) of its tessellation,
+# or as many as needed to draw segments of `pixelLength` pixels on screen.
+TESSELLATE_FIXED = 0
+TESSELLATE_FLATNESS = 1
+TESSELLATE_SCREEN = 2
+
+# Bezier curves up to this degree are evaluated through a cached Bernstein
+# basis matrix, higher degrees fall back to de Casteljau's algorithm (slower,
+# but numerically stable).
+BEZIER_MAX_BASIS_DEGREE = 24
+
+# Glyph constants represent the shape drawn for each instance of a
+# `GlyphPrim`: the 3 axes of a transform or an arrow along the X axis.
+GLYPH_AXES = 0
+GLYPH_ARROW = 1
+
+# Culling constants: primitives that don't change get indexed in a grid of
+# `CULL_CELL_SIZE` units, so culling them doesn't need to visit every one.
+CULL_CELL_SIZE = 10.0
+
+# Level of detail constants, from full detail to the simplest variant of a
+# primitive (see `LodPolicy`). Reduced curves keep one of every
+# `LOD_CURVE_STEP` samples (squared on minimal).
+LOD_FULL = 0
+LOD_REDUCED = 1
+LOD_MINIMAL = 2
+LOD_CURVE_STEP = 4
 
 # Callback constants defining the order in which callbacks are called.
 CALLBACK_PREUPDATE = 0
 CALLBACK_POSTUPDATE = 1
 
+# Heads up display showing the stats of the last drawn frame (see
+# `SceneManager.showStats`), and the section of the viewport it's shown on.
+STATS_HUD = 'mscreenStats'
+STATS_HUD_SECTION = 5
+
 
 # == Primitive ==
 
@@ -90,21 +187,100 @@ class Primitive(object):
     some minimums in order to play nicely with the whole system.
     """
     def __init__(self, transform=None):
-        logger.debug('Initializing: {}'.format(self))
+        logger.debug('Initializing: %s', self)
         self._transform = om2.MTransformationMatrix() if transform is None \
             else om2.MTransformationMatrix(transform)
         self._preCallbacks = list()
         self._postCallbacks = list()
+        # `_parent` is either another primitive or the `MDagPath` of a Maya
+        # node, `_children` are the primitives parented to this one.
         self._parent = None
-        # `isDirty` sets whether or not the primitive needs to be updated
-        # before drawing.
-        self.isDirty = False
+        self._parentHandle = None
+        self._children = list()
+        # World matrix cache, `None` when it needs to be computed again.
+        self._worldMatrix = None
+        # Bounding box cache and the buffer versions it was computed from.
+        self._bounds = None
+        self._boundsKey = None
+        # `lodPolicy` overrides the level of detail policy of the scene for
+        # this primitive (see `LodPolicy`).
+        self.lodPolicy = None
+        # `panels` restricts the model panels the primitive is drawn on (a
+        # collection of panel names), `None` means all of them.
+        self.panels = None
+        self._frame = None  # last frame the primitive was prepared on
+        # Maya messages watching `parent`, they are removed along with the
+        # primitive (the messages only hold a weak reference to it).
+        self._parentCallbacks = list()
+        # local matrix last seen once `transform` has been handed out (it
+        # may get modified in place), `None` while not watched.
+        self._watchedMatrix = None
+        # `_handle`, `_layer` and `_scene` are assigned by the `SceneManager`
+        # when the primitive gets registered.
+        self._handle = None
+        self._layer = None
+        self._scene = None
+        self._isDirty = False
+
+    # `isDirty` sets whether or not the primitive needs to be updated
+    # before drawing, flagging a registered primitive as dirty schedules it
+    # to be prepared on the next draw.
+    @property
+    def isDirty(self):
+        return self._isDirty
+
+    @isDirty.setter
+    def isDirty(self, value):
+        self._isDirty = value
+        if value:
+            self._schedule()
+
+    def _schedule(self):
+        # Asks the scene to prepare the primitive on the next draw.
+        if self._scene is not None:
+            self._scene._dirty.add(self._handle)
+
+    # `isLive` primitives are prepared on every draw (even when not dirty),
+    # that's the case of primitives driven by callbacks. Primitives polling
+    # their data on `prepare` extend it.
+    @property
+    def isLive(self):
+        return bool(self._preCallbacks or self._postCallbacks)
+
+    # `boundingBox` is the world space bounding box of the primitive as a
+    # pair of (x, y, z) tuples (min, max), or `None` when unknown (i.e.
+    # primitives drawing themselves are never culled). It's computed from the
+    # buffers of `drawItems` and cached until any of them change.
+    @property
+    def boundingBox(self):
+        return self._itemsBounds(self.drawItems())
+
+    def _itemsBounds(self, items):
+        if not items:
+            return None
+        key = tuple(x.buffer.version for x in items)
+        if key != self._boundsKey:
+            bounds = None
+            for each in items:
+                bounds = _unionBounds(bounds, each.buffer.bounds)
+            self._bounds = bounds
+            self._boundsKey = key
+        return self._bounds
 
     # `transform` holds an OpenMaya 2.0 `MTransformationMatrix` object
     # representing the transformation matrix of the primitive. Feel free to
     # modify or assing a new transform taking advantage of Maya API.
+
+    # Changes made in place can't be notified, so once `transform` is handed
+    # out the scene compares it against the last seen matrix on every frame
+    # (see `_checkTransform`), primitives only modified through the methods
+    # below (or by assigning a new transform) are never polled.
     @property
     def transform(self):
+        if self._watchedMatrix is None:
+            self._watchedMatrix = self._transform.asMatrix()
+            if self._scene is not None:
+                self._scene._watched.add(self._handle)
         return self._transform
 
     @transform.setter
@@ -112,28 +288,109 @@ class Primitive(object):
         value = om2.MTransformationMatrix(value)  # copy
         if self._transform != value:
             self._transform = value
-            self.isDirty = True
+            self._invalidateWorld()
+
+    def _checkTransform(self):
+        # Flags the world matrix as stale if `transform` was modified in
+        # place since the last check.
+        matrix = self._transform.asMatrix()
+        if matrix != self._watchedMatrix:
+            self._watchedMatrix = matrix
+            self._invalidateWorld()
+
+    # `parent` drives the `transform` of the primitive (live connection), it
+    # can be another primitive or a Maya DAG node (given as a name,
+    # `MObject` or `MDagPath`), in which case `transform` is relative to the
+    # node's world matrix. It's possible to unparent any given primitive by
+    # setting its `parent` to `None`.
 
-    # `parent` holds a reference to a `MObject` driving the `transform` of the
-    # primitive (live connection). It's possible to unparent any given
-    # primitive by setting its `parent` to `None`.
+    # Rather than pulling the parent's matrix on every draw, the primitive
+    # listens to the node's messages (dirty plugs, attribute changes and
+    # removal) and gets scheduled only when the parent changes.
     @property
     def parent(self):
-        if self._parent is not None and \
-                (self._parent.isNull() or
-                 not len(om2.MFnDagNode(self._parent).fullPathName())):
-            self._parent = None
-        return self._parent
+        if self._parentHandle is not None and \
+                not self._parentHandle.isValid():
+            self.parent = None
+        if isinstance(self._parent, Primitive):
+            return self._parent
+        return self._parent.node() if self._parent is not None else None
 
     @parent.setter
-    def parent(self, mobject):
-        if isinstance(mobject, basestring):
+    def parent(self, value):
+        if isinstance(value, basestring):
             _sel = om2.MSelectionList()
-            _sel.add(mobject)
-            mobject = _sel.getDependNode(0)
-        elif isinstance(mobject, om2.MDagPath):
-            mobject = mobject.node()
-        self._parent = mobject
+            _sel.add(value)
+            value = _sel.getDagPath(0)
+        elif isinstance(value, om2.MObject):
+            value = om2.MDagPath.getAPathTo(value)
+        elif isinstance(value, Primitive):
+            each = value
+            while each is not None:
+                if each is self:
+                    raise ValueError('Cyclic parenting: {}'.format(value))
+                each = each._parent if isinstance(each, Primitive) else None
+
+        # detach from the current parent
+        if isinstance(self._parent, Primitive):
+            self._parent._children.remove(self)
+        if self._parentCallbacks:
+            om2.MMessage.removeCallbacks(self._parentCallbacks)
+            del self._parentCallbacks[:]
+        self._parent = value
+        self._parentHandle = None
+
+        if isinstance(value, Primitive):
+            value._children.append(self)
+        elif value is not None:
+            node = value.node()
+            self._parentHandle = om2.MObjectHandle(node)
+            callback = _parentCallback(
+                weakref.ref(self, _removeCallbacks(self._parentCallbacks)))
+            self._parentCallbacks.extend((
+                om2.MNodeMessage.addNodeDirtyPlugCallback(node, callback),
+                om2.MNodeMessage.addAttributeChangedCallback(node, callback),
+                om2.MNodeMessage.addNodePreRemovalCallback(node, callback),
+            ))
+        self._invalidateWorld()
+
+    # `children` lists the primitives parented to this one.
+    @property
+    def children(self):
+        return list(self._children)
+
+    # `worldMatrix` is the `transform` of the primitive composed with the
+    # world matrix of its `parent` (as an `MMatrix`). It's cached and only
+    # computed again after the primitive or any of its ancestors change.
+    @property
+    def worldMatrix(self):
+        if self._worldMatrix is None:
+            matrix = self._transform.asMatrix()
+            parentMatrix = self.parentMatrix
+            if parentMatrix is not None:
+                matrix *= parentMatrix
+            self._worldMatrix = matrix
+        return self._worldMatrix
+
+    # `parentMatrix` is the world matrix of `parent` (`None` if unparented).
+    @property
+    def parentMatrix(self):
+        if self.parent is None:
+            return None
+        if isinstance(self._parent, Primitive):
+            return self._parent.worldMatrix
+        return self._parent.inclusiveMatrix()
+
+    def _invalidateWorld(self):
+        # Flags the world matrix of the primitive as stale along with its
+        # subtree (already stale subtrees are skipped).
+        stale = self._worldMatrix is None
+        self._worldMatrix = None
+        self.isDirty = True
+        if stale:
+            return
+        for each in self._children:
+            each._invalidateWorld()
 
     # === Transform methods ===
 
@@ -145,8 +402,8 @@ class Primitive(object):
         if x == y == z == 0.0:
             return
         offset = om2.MVector(x, y, z)
-        self.transform.translateBy(offset, om2.MSpace.kWorld)
-        self.isDirty = True
+        self._transform.translateBy(offset, om2.MSpace.kWorld)
+        self._invalidateWorld()
 
     def rotate(self, x=0.0, y=0.0, z=0.0, asDegrees=True):
         if x == y == z == 0.0:
@@ -156,16 +413,16 @@ class Primitive(object):
             y = math.radians(y)
             z = math.radians(z)
         euler = (x, y, z, om2.MTransformationMatrix.kXYZ)
-        self.transform.rotateByComponents(euler, om2.MSpace.kWorld,
+        self._transform.rotateByComponents(euler, om2.MSpace.kWorld,
                                           asQuaternion=False)
-        self.isDirty = True
+        self._invalidateWorld()
 
     def scale(self, x=0.0, y=0.0, z=0.0):
         if x == y == z == 0.0:
             return
         offset = om2.MVector(x, y, z)
-        self.transform.scaleBy(offset, om2.MSpace.kWorld)
-        self.isDirty = True
+        self._transform.scaleBy(offset, om2.MSpace.kWorld)
+        self._invalidateWorld()
 
     # === Primitive callbacks ===
 
@@ -188,6 +445,7 @@ class Primitive(object):
         elif type == CALLBACK_POSTUPDATE:
             index = len(self._postCallbacks)
             self._postCallbacks.append(function)
+        self._schedule()  # callbacks make the primitive live
         return index
 
     def unregisterCallback(self, item, type=CALLBACK_PREUPDATE):
@@ -215,26 +473,16 @@ class Primitive(object):
         is VERY IMPORTANT, otherwise your primitive will be updated each time
         the viewport gets refreshed (even when the data doesn't change).
         """
-        logger.debug('Updating: {}'.format(self))
+        logger.debug('Updating: %s', self)
         self.isDirty = False
 
-    def draw(self, view, renderer):
+    def prepare(self, view):
         """
-        `draw` is in charge of actually making the OpenGL calls to draw
-        whetever the primitive represent on the viewport.
-
-        The base class provides the minimum loop needed *before* doing any
-        drawing in order to be compatible with the callback system. That means
-        this method is intended to be *EXTENDED* (i.e. always call super
-        on subclasses... unless you know what you're doing).
+        `prepare` provides the minimum loop needed *before* doing any drawing
+        in order to be compatible with the callback system (callbacks and
+        `update`).
         """
-        logger.debug('Drawing: {}'.format(self))
-
-        # Update transform according to `parent`.
-        if self.parent:
-            fn = om2.MFnTransform(self.parent)
-            self.transform = fn.transformation()
-            self.isDirty = True
+        logger.debug('Preparing: %s', self)
 
         # Run pre-update callbacks (i.e. registered as `CALLBACK_PREUPDATE`).
         toRemove = []
@@ -256,7 +504,76 @@ class Primitive(object):
             if not each(self):
                 toRemove.append(each)
         for x in toRemove:
-            self.unregisterCallback(x)
+            self.unregisterCallback(x, CALLBACK_POSTUPDATE)
+
+    def drawItems(self):
+        """
+        `drawItems` describes the geometry of the primitive as a list of
+        `DrawItem`s, this lets `SceneManager` batch compatible primitives
+        together (same kind of geometry and OpenGL state) and draw them at
+        once.
+
+        Primitives returning `None` (default) are expected to make their own
+        OpenGL calls by extending `draw`.
+        """
+        return None
+
+    def lodItems(self, level):
+        """
+        `lodItems` returns the draw items of a simplified variant of the
+        primitive for a given `level` of detail (see LOD constants), by
+        default there are no variants and `drawItems` is used.
+
+        Variants are expected to be cached, as this is called on every draw.
+        """
+        return self.drawItems()
+
+    def draw(self, view, renderer):
+        """
+        `draw` is in charge of actually making the OpenGL calls to draw
+        whetever the primitive represent on the viewport.
+
+        The base class calls `prepare` and draws the `drawItems` (if any).
+        That means this method is intended to be *EXTENDED* (i.e. always call
+        super on subclasses... unless you know what you're doing).
+        """
+        logger.debug('Drawing: %s', self)
+        self.prepare(view)
+        items = self.drawItems()
+        if items:
+            backend = _asBackend(renderer)
+            backend.begin(view)
+            _drawItems(backend, items)
+            backend.end(view)
+
+
+def _parentCallback(ref):
+    # Maya message callback flagging the world matrix of the primitive
+    # referenced by `ref` (weak reference) as stale.
+    def callback(*args):
+        primitive = ref()
+        if primitive is not None:
+            primitive._invalidateWorld()
+    return callback
+
+
+def _meshCallback(ref):
+    # Maya message callback scheduling the `MeshMirrorPrim` referenced by
+    # `ref` (weak reference) to read its mesh again.
+    def callback(*args):
+        primitive = ref()
+        if primitive is not None:
+            primitive._meshChanged = True
+            primitive._schedule()
+    return callback
+
+
+def _removeCallbacks(callbacks):
+    # Removes Maya `callbacks` (a list of ids) once the owner is collected.
+    def remove(ref):
+        if callbacks:
+            om2.MMessage.removeCallbacks(callbacks)
+    return remove
 
 
 # === Curve Primitive ===
@@ -271,68 +588,229 @@ class CurvePrim(Primitive):
         self.width = width
         # `color` of the curve (tuple of floats representing RGB components)
         self.color = color or COLOR_BLACK
+
+        self._points = list()  # control points (built on demand)
+        self._worldPoints = _pointArray(())  # control points, packed
+        self._drawPoints = _pointArray(())  # drawable points
+        self._prePoints = _pointArray(())  # pre-transform points
+        self._buffer = VertexBuffer()  # packed drawable points
+        self._lodBuffers = dict()  # level: (source version, VertexBuffer)
+
         # `degree` represents the type of curve (i.e. linear or bezier)
-        self.degree = degree or CURVE_LINEAR
+        self.degree = degree
 
-        self._points = list()  # control points
-        self._drawPoints = list()  # drawable points
-        self._prePoints = list()  # pre-transform points
+        # `tessellation` mode (see tessellation constants), `tolerance` and
+        # `pixelLength` drive the adaptive modes.
+        self._tessellation = TESSELLATE_FIXED
+        self._tolerance = 0.01
+        self._pixelLength = 8.0
+        self._camera = None
 
-        if points:
+        if points is not None:
             self.points = points
 
-    # `points` are the control points of the curve.
+    # Curves (other than linear ones) keep their tessellation cached per span
+    # in local space along with the number of samples of each span,
+    # `_dirtySpans` holds the spans to recompute on the next update (`None`
+    # meaning all of them).
+    @property
+    def degree(self):
+        return self._degree
+
+    @degree.setter
+    def degree(self, value):
+        value = value or CURVE_LINEAR
+        _checkSplinePoints(value, len(self._prePoints))
+        self._degree = value
+        self._spans = list()
+        self._samples = list()
+        self._dirtySpans = None
+        self.isDirty = True
+
+    @property
+    def tessellation(self):
+        return self._tessellation
+
+    @tessellation.setter
+    def tessellation(self, value):
+        self._tessellation = value
+        self.isDirty = True
+
+    # `tolerance` is the maximum distance (world units) allowed between the
+    # curve and its tessellation on `TESSELLATE_FLATNESS` mode.
+    @property
+    def tolerance(self):
+        return self._tolerance
+
+    @tolerance.setter
+    def tolerance(self, value):
+        self._tolerance = max(float(value), 1e-6)
+        self.isDirty = True
+
+    # `pixelLength` is the length (in pixels) of each segment on
+    # `TESSELLATE_SCREEN` mode.
+    @property
+    def pixelLength(self):
+        return self._pixelLength
+
+    @pixelLength.setter
+    def pixelLength(self, value):
+        self._pixelLength = max(float(value), 1.0)
+        self.isDirty = True
+
+    # `points` are the control points of the curve (world space `MPoint`s).
+    # They can be set from any sequence of points or, if NumPy is available,
+    # from a (N, 3) array (which is how they get stored internally).
     @property
     def points(self):
         if self.isDirty:
             self.update()
+        if self._points is None:
+            self._points = [om2.MPoint(p) for p in _pointList(
+                self._worldPoints)]
         return self._points
 
     @points.setter
     def points(self, value):
-        self._prePoints = list(value)
-        self._drawPoints = list(value)
+        prePoints = _pointArray(value)
+        _checkSplinePoints(self.degree, len(prePoints))
+        if self._dirtySpans is not None and \
+                len(prePoints) == len(self._prePoints):
+            for i in _changedPoints(prePoints, self._prePoints):
+                self._invalidateSpans(i)
+        else:
+            self._dirtySpans = None
+        self._prePoints = prePoints
+        self._drawPoints = prePoints
+        self.isDirty = True
+
+    def setPoint(self, index, value):
+        """
+        Moves a single control point, on piecewise curves only the spans
+        influenced by said point get tessellated again.
+        """
+        point = _toXYZ(value)
+        if _toXYZ(self._prePoints[index]) == point:
+            return
+        self._prePoints[index] = point
+        self._invalidateSpans(index)
         self.isDirty = True
 
+    def _invalidateSpans(self, index):
+        if self._dirtySpans is not None:
+            self._dirtySpans.update(_splineSpansForPoint(
+                self.degree, index, len(self._prePoints)))
+
+    def _spanSamples(self):
+        # Number of samples of each span according to the tessellation mode,
+        # adaptive modes work on world space so the curve's transform (and
+        # the camera) are taken into account.
+        count = len(self._worldPoints)
+        numSpans = _splineSpans(self.degree, count)
+        mode = self.tessellation
+        if mode == TESSELLATE_SCREEN and self._camera is None:
+            mode = TESSELLATE_FIXED
+
+        samples = list()
+        for span in xrange(numSpans):
+            indices = _splineSpanPoints(self.degree, span, count)
+            # a global bezier is sampled as one span per control point
+            scale = len(indices) - 1 if self.degree == CURVE_BEZIER else 1
+            if mode == TESSELLATE_FIXED:
+                samples.append(scale * CURVE_SPAN_SAMPLES)
+                continue
+            cvs = [self._worldPoints[i] for i in indices]
+            if mode == TESSELLATE_FLATNESS:
+                segments = _flatnessSegments(self.degree, cvs, self.tolerance)
+            else:
+                segments = _polygonLength(cvs) * \
+                    self._camera.pixelScale(_centroid(cvs)) / self.pixelLength
+            samples.append(_clamp(int(math.ceil(segments)) + 1, 2,
+                                  scale * CURVE_MAX_SPAN_SAMPLES))
+        return samples
+
+    def _tessellateSpans(self, samples):
+        count = len(self._prePoints)
+        numSpans = len(samples)
+        if not numSpans:
+            return self._prePoints
+
+        if self._dirtySpans is None or len(self._spans) != numSpans:
+            self._spans = [None] * numSpans
+            self._samples = [0] * numSpans
+            dirty = set(xrange(numSpans))
+        else:
+            dirty = self._dirtySpans
+        for span in xrange(numSpans):
+            if span not in dirty and samples[span] == self._samples[span]:
+                continue
+            cvs = [self._prePoints[i]
+                   for i in _splineSpanPoints(self.degree, span, count)]
+            if self.degree == CURVE_BEZIER:
+                self._spans[span] = _bezierSamples(cvs, samples[span])
+            else:
+                basis = _splineBasis(self.degree, samples[span])
+                self._spans[span] = _evaluateBasis(basis, cvs)
+            self._samples[span] = samples[span]
+        self._dirtySpans = set()
+
+        # consecutive spans share their end/start samples
+        spans = [self._spans[0]] + [x[1:] for x in self._spans[1:]]
+        if np is not None:
+            return np.concatenate(spans)
+        return list(itertools.chain.from_iterable(spans))
+
     def update(self):
         super(CurvePrim, self).update()
-        self._points = []
-        matrix = self.transform.asMatrix()
-        for i in xrange(len(self._prePoints)):
-            point = om2.MPoint(self._prePoints[i])
-            point *= matrix
-            self._points.append(point)
+        matrix = self.worldMatrix
+        self._worldPoints = _transformPoints(self._prePoints, matrix)
+        self._points = None
 
         if self.degree == CURVE_LINEAR:
-            self._drawPoints = [x for x in self._points]
-
-        elif self.degree == CURVE_BEZIER:
-            num_points = len(self._points)
-            segs = (num_points - 1) * 16
-            self._drawPoints = list()
-            for i in range(segs):
-                t = i/float(segs - 1)
-                p = bezierInterpolate(t, self._points)
-                self._drawPoints.append(p)
+            self._drawPoints = self._worldPoints
+        else:
+            # curves are affine invariant, so spans are tessellated (and
+            # cached) in local space and just transformed afterwards.
+            spans = self._tessellateSpans(self._spanSamples())
+            self._drawPoints = _transformPoints(spans, matrix)
+        self._buffer.setPoints(self._drawPoints)
 
-    def draw(self, view, renderer):
-        super(CurvePrim, self).draw(view, renderer)
+    @property
+    def isLive(self):
+        return self.tessellation == TESSELLATE_SCREEN or \
+            super(CurvePrim, self).isLive
 
-        view.beginGL()
-        glFT = renderer.glFunctionTable()
-        glFT.glPushAttrib(omr.MGL_LINE_BIT)
-        glFT.glLineWidth(self.width)
-        glFT.glBegin(omr.MGL_LINE_STRIP)
+    def prepare(self, view):
+        # Screen space tessellation is cached until the camera changes, and
+        # even then only spans whose number of samples differ get updated.
+        if self.tessellation == TESSELLATE_SCREEN:
+            camera = Camera.current(view)
+            if self._camera is None or camera.key != self._camera.key:
+                self._camera = camera
+                if not self.isDirty and self._spanSamples() != self._samples:
+                    self.isDirty = True
 
-        r, g, b = [float(x) for x in self.color]
-        glFT.glColor3f(r, g, b)
+        super(CurvePrim, self).prepare(view)
 
-        for point in self._drawPoints:
-            glFT.glVertex3f(point.x, point.y, point.z)
+    def drawItems(self):
+        return [DrawItem(omr.MGL_LINE_STRIP, self.width,
+                         tuple(float(x) for x in self.color), self._buffer)]
 
-        glFT.glEnd()
-        glFT.glPopAttrib()
-        view.endGL()
+    def lodItems(self, level):
+        # Lower levels of detail decimate the tessellation (keeping both
+        # ends), linear curves have nothing to decimate.
+        if self.degree == CURVE_LINEAR:
+            return self.drawItems()
+        cached = self._lodBuffers.get(level)
+        if cached is None or cached[0] != self._buffer.version:
+            count = self._buffer.count
+            indices = list(xrange(0, count - 1, LOD_CURVE_STEP ** level))
+            indices.append(count - 1)
+            buffer = VertexBuffer()
+            buffer.setArrays(_gatherArray(self._buffer.vertices, indices, 3))
+            cached = self._lodBuffers[level] = (self._buffer.version, buffer)
+        return [DrawItem(omr.MGL_LINE_STRIP, self.width,
+                         tuple(float(x) for x in self.color), cached[1])]
 
 
 # === Vector Primitive ===
@@ -348,9 +826,9 @@ class VectorPrim(Primitive):
         # body line
         _points = ((0, 0, 0), vector)
         self.body = CurvePrim(_points, color=self.color)
-        self.body.scale(self.size, self.size, self.size)
+        self.body.parent = self
 
-        # head line
+        # head line (built along the X axis and oriented towards `vector`)
         m_vector = om2.MVector(*vector)
         length = m_vector.length()
         headSize = 0.1 * length
@@ -358,6 +836,8 @@ class VectorPrim(Primitive):
                   (length, 0.0, 0.0),
                   (length-headSize, -headSize, 0.0))
         self.head = CurvePrim(points, color=self.color)
+        self.head.parent = self
+        self._rotation = om2.MVector(1, 0, 0).rotateTo(m_vector)
         self.isDirty = True  # force to re-orient header
 
     # `size` represents the scale in which the vector is drawed on the screen
@@ -372,26 +852,28 @@ class VectorPrim(Primitive):
 
     def update(self):
         super(VectorPrim, self).update()
-        # update the line along the length of the vector
+        # `body` and `head` are children of the vector, their transforms are
+        # local and only need to change along with `size`.
+        body = om2.MTransformationMatrix()
+        body.setScale((self.size, self.size, self.size), om2.MSpace.kTransform)
+        head = om2.MTransformationMatrix(body)
+        head.setRotation(self._rotation)
         self.body.color = self.color
-        self.body.transform = self.transform
-        self.body.transform.setScale((self.size, self.size, self.size),
-                                     om2.MSpace.kWorld)
-        self.body.update()
-
-        # update the header of the vector (arrow)
+        self.body.transform = body
         self.head.color = self.color
-        self.head.transform = self.body.transform
-        m_vector = om2.MVector(self.body._drawPoints[1])
-        m_vector -= self.transform.translation(om2.MSpace.kWorld)
-        m_vectorX = om2.MVector(1, 0, 0)
-        m_rot = m_vectorX.rotateTo(m_vector)
-        self.head.transform.setRotation(m_rot)
+        self.head.transform = head
 
-    def draw(self, view, renderer):
-        super(VectorPrim, self).draw(view, renderer)
-        self.body.draw(view, renderer)
-        self.head.draw(view, renderer)
+    def prepare(self, view):
+        super(VectorPrim, self).prepare(view)
+        self.body.prepare(view)
+        self.head.prepare(view)
+
+    def drawItems(self):
+        return self.body.drawItems() + self.head.drawItems()
+
+    def lodItems(self, level):
+        # the arrow head gets collapsed, leaving a single line
+        return self.body.lodItems(level)
 
 
 # === Transformation Matrix Primitive ===
@@ -408,7 +890,12 @@ class TransformPrim(Primitive):
         self._xAxis = VectorPrim((1, 0, 0), color=TransformPrim.X_COLOR)
         self._yAxis = VectorPrim((0, 1, 0), color=TransformPrim.Y_COLOR)
         self._zAxis = VectorPrim((0, 0, 1), color=TransformPrim.Z_COLOR)
+        for each in (self._xAxis, self._yAxis, self._zAxis):
+            each.parent = self
         self.size = size
+        # minimal level of detail, a point at the origin of the transform
+        self._lodBuffer = VertexBuffer()
+        self._lodMatrix = None
 
     @property
     def size(self):
@@ -424,13 +911,30 @@ class TransformPrim(Primitive):
         for each in (self._xAxis, self._yAxis, self._zAxis):
             if each.size != self.size:
                 each.size = self.size
-            if each.transform != self.transform:
-                each.transform = self.transform
 
-    def draw(self, view, renderer):
-        super(TransformPrim, self).draw(view, renderer)
+    def prepare(self, view):
+        super(TransformPrim, self).prepare(view)
+        for each in (self._xAxis, self._yAxis, self._zAxis):
+            each.prepare(view)
+
+    def drawItems(self):
+        items = list()
         for each in (self._xAxis, self._yAxis, self._zAxis):
-            each.draw(view, renderer)
+            items.extend(each.drawItems())
+        return items
+
+    def lodItems(self, level):
+        if level < LOD_MINIMAL:
+            items = list()
+            for each in (self._xAxis, self._yAxis, self._zAxis):
+                items.extend(each.lodItems(level))
+            return items
+        matrix = self.worldMatrix
+        if self._lodMatrix is not matrix:
+            self._lodMatrix = matrix
+            self._lodBuffer.setPoints(((matrix[12], matrix[13], matrix[14]),))
+        return [DrawItem(omr.MGL_POINTS, 3,
+                         tuple(float(x) for x in COLOR_GRAY), self._lodBuffer)]
 
 
 # === Point Primitive ===
@@ -440,10 +944,11 @@ class PointPrim(Primitive):
         super(PointPrim, self).__init__()
 
         position = om2.MVector() if position is None else om2.MVector(position)
-        self.transform.setTranslation(position, om2.MSpace.kWorld)
+        self._transform.setTranslation(position, om2.MSpace.kWorld)
         # `color` as a tuple of floats representing RGB values (normalized).
         self.color = color or COLOR_BLACK
         self.size = size
+        self._buffer = VertexBuffer()
 
     # `size` in pixels.
     @property
@@ -454,24 +959,19 @@ class PointPrim(Primitive):
     def size(self, value):
         self._size = max(int(value), 1)
 
-    def draw(self, view, renderer):
-        super(PointPrim, self).draw(view, renderer)
-
-        view.beginGL()
-        glFT = renderer.glFunctionTable()
-        glFT.glPushAttrib(omr.MGL_POINT_BIT)
-        glFT.glPointSize(self.size)
-        glFT.glBegin(omr.MGL_POINTS)
-
-        r, g, b = [float(x) for x in self.color]
-        glFT.glColor3f(r, g, b)
+    def prepare(self, view):
+        super(PointPrim, self).prepare(view)
+        point = om2.MPoint(self._transform.translation(om2.MSpace.kWorld))
+        parentMatrix = self.parentMatrix
+        if parentMatrix is not None:
+            point *= parentMatrix
+        point = _toXYZ(point)
+        if self._buffer.vertices[:3].tolist() != list(point):
+            self._buffer.setPoints((point,))
 
-        point = self.transform.translation(om2.MSpace.kWorld)
-        glFT.glVertex3f(point.x, point.y, point.z)
-
-        glFT.glEnd()
-        glFT.glPopAttrib()
-        view.endGL()
+    def drawItems(self):
+        return [DrawItem(omr.MGL_POINTS, self.size,
+                         tuple(float(x) for x in self.color), self._buffer)]
 
 
 # === Triangle Primitive ===
@@ -481,25 +981,30 @@ class TrianglePrim(Primitive):
     """
     def __init__(self, points=None, colors=None):
         super(TrianglePrim, self).__init__()
-        self._points = list()  # control points
-        self._drawPoints = list()  # drawable points
-        self._prePoints = list()  # pre-transform points
+        self._points = list()  # control points (built on demand)
+        self._drawPoints = _pointArray(())  # drawable points
+        self._prePoints = _pointArray(())  # pre-transform points
+        self._buffer = VertexBuffer()  # packed drawable points (and colors)
         self._colors = None
         self._colorPerPoint = False
-        if points:
+        if points is not None:
             self.points = points
         self.colors = colors or COLOR_BLACK
 
+    # Same as `CurvePrim.points`, a (N, 3) NumPy array is also accepted.
     @property
     def points(self):
         if self.isDirty:
             self.update()
+        if self._points is None:
+            self._points = [om2.MPoint(p) for p in _pointList(
+                self._drawPoints)]
         return self._points
 
     @points.setter
     def points(self, value):
-        self._prePoints = list(value)
-        self._drawPoints = list(value)
+        self._prePoints = _pointArray(value)
+        self._drawPoints = self._prePoints
         self.isDirty = True
 
     @property
@@ -526,153 +1031,2997 @@ class TrianglePrim(Primitive):
 
     def update(self):
         super(TrianglePrim, self).update()
-        self._points = []
-        matrix = self.transform.asMatrix()
-        for i in xrange(len(self._prePoints)):
-            point = om2.MPoint(self._prePoints[i])
-            point *= matrix
-            self._points.append(point)
+        matrix = self.worldMatrix
+        self._drawPoints = _transformPoints(self._prePoints, matrix)
+        self._points = None
+        self._buffer.setPoints(self._drawPoints)
+        self._buffer.setColors(self._colors if self._colorPerPoint else None)
 
-    def draw(self, view, renderer):
-        super(TrianglePrim, self).draw(view, renderer)
-        view.beginGL()
-        glFT = renderer.glFunctionTable()
-        if self._colorPerPoint:
-            glFT.glShadeModel(omr.MGL_SMOOTH)
-        else:
-            glFT.glColor3f(*self.colors)
-        glFT.glBegin(omr.MGL_TRIANGLES)
+    def drawItems(self):
+        color = None if self._colorPerPoint else \
+            tuple(float(x) for x in self.colors)
+        return [DrawItem(omr.MGL_TRIANGLES, 0, color, self._buffer)]
 
-        for i, point in enumerate(self._points):
-            if self._colorPerPoint:
-                glFT.glColor3f(*self.colors[i])
-            glFT.glVertex3f(point.x, point.y, point.z)
 
-        glFT.glEnd()
-        view.endGL()
+# === Mesh Primitive ===
+class MeshPrim(Primitive):
+    """
+    Primitive representing an indexed triangle mesh, `vertices` are shared
+    by triangles (3 `indices` each) so every vertex is transformed just once.
 
+    Per-vertex `colors` and `normals` are optional, a uniform `color` is
+    used when no per-vertex colors are given.
+    """
+    def __init__(self, vertices=None, indices=None, colors=None,
+                 normals=None, color=None):
+        super(MeshPrim, self).__init__()
+        self.color = color or COLOR_BLACK
+        self._vertices = _pointArray(())  # pre-transform vertices
+        self._indices = array.array('I')
+        self._colors = None
+        self._normals = None
+        self._buffer = VertexBuffer()
+        if vertices is not None:
+            self.vertices = vertices
+        if indices is not None:
+            self.indices = indices
+        self.colors = colors
+        self.normals = normals
 
-# === Scene Manager ===
-class SceneManager(object):
+    # `vertices` can be set from any sequence of points or a (N, 3) NumPy
+    # array.
+    @property
+    def vertices(self):
+        return self._vertices
+
+    @vertices.setter
+    def vertices(self, value):
+        self._vertices = _pointArray(value)
+        self.isDirty = True
+
+    # `indices` can be set from a flat sequence of integers or a sequence
+    # of triangles (3 integers each).
+    @property
+    def indices(self):
+        return self._indices
+
+    @indices.setter
+    def indices(self, value):
+        self._indices = _indexArray(value)
+        self.isDirty = True
+
+    @property
+    def colors(self):
+        return self._colors
+
+    @colors.setter
+    def colors(self, value):
+        self._colors = None if value is None else _floatArray(value)
+        self.isDirty = True
+
+    @property
+    def normals(self):
+        return self._normals
+
+    @normals.setter
+    def normals(self, value):
+        self._normals = None if value is None else _pointArray(value)
+        self.isDirty = True
+
+    def update(self):
+        super(MeshPrim, self).update()
+        self._checkArrays()
+        matrix = self.worldMatrix
+        vertices = _floatArray(_transformPoints(self._vertices, matrix))
+        normals = None
+        if self._normals is not None:
+            normals = _floatArray(_transformNormals(self._normals, matrix))
+        self._buffer.setArrays(vertices, self._colors, self._indices,
+                               normals)
+
+    def _checkArrays(self):
+        # Arrays are handed to OpenGL as they are, any index or per vertex
+        # array not matching the vertices would be read out of bounds.
+        count = len(self._vertices)
+        indices = self._indices
+        if len(indices) % 3:
+            raise ValueError('Expected 3 indices per triangle, got {}'.format(
+                len(indices)))
+        if len(indices):
+            last = np.frombuffer(indices, dtype='I').max() \
+                if np is not None else max(indices)
+            if last >= count:
+                raise ValueError('Index {} out of range ({} vertices)'.format(
+                    last, count))
+        if self._colors is not None and len(self._colors) != count * 3:
+            raise ValueError('Expected {} colors, got {:g}'.format(
+                count, len(self._colors) / 3.0))
+        if self._normals is not None and len(self._normals) != count:
+            raise ValueError('Expected {} normals, got {}'.format(
+                count, len(self._normals)))
+
+    def drawItems(self):
+        color = None if self._colors is not None else \
+            tuple(float(x) for x in self.color)
+        return [DrawItem(omr.MGL_TRIANGLES, 0, color, self._buffer)]
+
+
+# === Mesh Mirror Primitive ===
+class MeshMirrorPrim(MeshPrim):
     """
-    `SceneManager` is the entity interacting with Maya renderer and managing
-    `mscreen` primitives, this is the main entry point for most users of the
-    library.
+    `MeshPrim` mirroring a Maya mesh (world space) live.
+
+    The primitive listens to the mesh's dirty messages, vertex positions
+    are only read (in bulk, as a raw float buffer) once the mesh changed,
+    compared against the previous ones and only the modified vertex ranges
+    get pushed to the vertex buffer. The topology is read on creation (or
+    when the number of vertices changes), see `reload`.
     """
-    view = omui.M3dView.active3dView()
-    renderer = omr.MHardwareRenderer.theRenderer()
+    # Modified vertices closer than `RANGE_GAP` are uploaded as one range.
+    RANGE_GAP = 16
 
-    def __init__(self):
-        # `mscreen` works by registering ONE callback in a Maya 3dview, said
-        # callback calls to `__draw` where all the registered primitives are
-        # proccessed.
-        self.callback = omui.MUiMessage.add3dViewPostRenderMsgCallback(
-            self.getCurrentModelPanel(), lambda *args: self.__draw())
-        self.primitives = list()
-        self._callbacks = list()
-        self.refresh()
+    def __init__(self, mesh, colors=None, color=None):
+        super(MeshMirrorPrim, self).__init__(colors=colors, color=color)
+        self._buffer.mergeable = False
+        if isinstance(mesh, basestring):
+            _sel = om2.MSelectionList()
+            _sel.add(mesh)
+            mesh = _sel.getDagPath(0)
+        elif isinstance(mesh, om2.MObject):
+            mesh = om2.MDagPath.getAPathTo(mesh)
+        self._path = mesh
+        self._node = om2.MObjectHandle(mesh.node())
+        # Vertices are kept in object space, the mesh's world matrix is
+        # composed into `worldMatrix` instead.
+        self._meshMatrix = mesh.inclusiveMatrix()
+        self._meshChanged = False
+        self._meshCallbacks = list()
+        callback = _meshCallback(
+            weakref.ref(self, _removeCallbacks(self._meshCallbacks)))
+        self._meshCallbacks.append(
+            om2.MNodeMessage.addNodeDirtyPlugCallback(mesh.node(), callback))
+        self.reload()
 
-    # Maya's callback is stored as a singleton in the maya module so it can be
-    # managed after reloading this module avoiding memory leaks.
     @property
-    def callback(self):
-        if hasattr(maya, "mscreen_callback"):
-            return maya.mscreen_callback
+    def isValid(self):
+        return self._node.isValid() and self._path.isValid()
 
-    @callback.setter
-    def callback(self, value):
-        del self.callback
-        maya.mscreen_callback = value
+    @property
+    def worldMatrix(self):
+        if self._worldMatrix is None:
+            matrix = super(MeshMirrorPrim, self).worldMatrix
+            self._worldMatrix = self._meshMatrix * matrix
+        return self._worldMatrix
 
-    @callback.deleter
-    def callback(self):
-        if not self.callback:
+    def reload(self):
+        """
+        Reads the whole mesh again (topology and vertex positions).
+        """
+        if not self.isValid:
             return
-        omui.MUiMessage.removeCallback(self.callback)
-        del maya.mscreen_callback
+        fn = om2.MFnMesh(self._path)
+        _, triangles = fn.getTriangles()
+        self.indices = list(triangles)
+        self.vertices = self._readPoints()
+
+    def _readPoints(self):
+        # Object space vertex positions (packed as `_pointArray`), copied
+        # straight from the mesh's raw float buffer (no per point objects).
+        sel = om.MSelectionList()
+        sel.add(self._path.fullPathName())
+        path = om.MDagPath()
+        sel.getDagPath(0, path)
+        fn = om.MFnMesh(path)
+        size = fn.numVertices() * 3 * ctypes.sizeof(ctypes.c_float)
+        data = ctypes.string_at(int(fn.getRawPoints()), size) if size \
+            else b''
+        return _flatPoints(_bufferArray('f', data, 0, size))
+
+    def prepare(self, view):
+        if self.isValid:
+            matrix = self._path.inclusiveMatrix()
+            if matrix != self._meshMatrix:
+                self._meshMatrix = matrix
+                self._invalidateWorld()
+        if self.isValid and self._meshChanged:
+            self._meshChanged = False
+            points = self._readPoints()
+            if self.isDirty and len(points) == len(self._vertices):
+                # the whole buffer gets rebuilt, just catch up with the mesh
+                self._vertices = points
+            else:
+                self._sync(points)
+        super(MeshMirrorPrim, self).prepare(view)
+
+    def _sync(self, points):
+        if len(points) != len(self._vertices):
+            self.reload()
+            return
+        changed = _changedPoints(points, self._vertices)
+        if not changed:
+            return
+        matrix = self.worldMatrix
+        for start, end in _ranges(changed, self.RANGE_GAP):
+            values = points[start:end]
+            self._vertices[start:end] = values
+            self._buffer.updateVertices(
+                start, _transformPoints(values, matrix))
+
+    def drawItems(self):
+        if not self.isValid:
+            return []
+        return super(MeshMirrorPrim, self).drawItems()
+
+
+# === Point Cloud Primitive ===
+class PointCloudPrim(Primitive):
+    """
+    Primitive representing a (potentially huge) number of points.
+
+    Unlike `PointPrim`, positions, colors and sizes are stored in contiguous
+    arrays and all points share the primitive's `transform`, points are
+    drawn at once (one call per distinct size).
+    """
+    def __init__(self, positions=None, colors=None, sizes=None, color=None,
+                 size=2):
+        super(PointCloudPrim, self).__init__()
+        # default `color` and `size` of points added without them
+        self.color = color or COLOR_BLACK
+        self.size = max(int(size), 1)
+
+        self._positions = array.array('d')  # x, y, z, x, y, z...
+        self._colors = array.array('d')  # r, g, b, r, g, b...
+        self._sizes = array.array('f')
+        self._buffers = list()  # (size, buffer)
+        if positions is not None:
+            self.append(positions, colors, sizes)
+
+    def __len__(self):
+        return len(self._sizes)
+
+    # `positions`, `colors` and `sizes` are the arrays backing the point
+    # cloud, they should be considered read only (use the methods below to
+    # modify them).
+    @property
+    def positions(self):
+        return self._positions
+
+    @property
+    def colors(self):
+        return self._colors
 
-    def __draw(self):
-        # run callbacks
-        for each in self._callbacks:
-            each()
-        # draw primitives
-        for each in self.primitives:
-            each.draw(self.view, self.renderer)
+    @property
+    def sizes(self):
+        return self._sizes
 
-    def refresh(self):
+    def setPositions(self, positions):
         """
-        Force a refresh of the Maya viewport.
+        Replaces all positions at once, `positions` can be a flat buffer of
+        floats (x, y, z, x, y, z...) or a sequence of points.
+
+        The number of points can't change (see `append` and `remove`).
         """
-        self.view.refresh(True, True)
+        positions = _floatArray(positions)
+        if len(positions) != len(self._positions):
+            logger.error('Expected {} positions'.format(len(self)))
+            return False
+        self._positions = positions
+        self.isDirty = True
+        return True
 
-    def clear(self):
+    def setColors(self, colors):
         """
-        Clear the screen by removing all registered primitives.
+        Replaces all colors, either by a single color or by a flat buffer of
+        floats/sequence of colors (one per point).
         """
-        self.primitives = list()
+        self._colors = self._perPoint(colors, self.color, len(self))
+        self.isDirty = True
 
-    def registerCallback(self, func):
+    def setSizes(self, sizes):
         """
-        Unless previous callbacks, this register a function at a mscreen level
-        that you can use to update all primitives according to some event.
-
-        An example of this callback is the particle system on
-        `tests/tests_stress.py`, where we register a callback simulating all
-        primitives/particles on time chance.
+        Replaces all sizes, either by a single size or one per point.
         """
-        self._callbacks.append(func)
-
-    def unregisterCallback(self, item):
-        if isinstance(item, int):
-            item = self._callbacks[item]
-        if item in self._callbacks:
-            self._callbacks.remove(item)
-
-    def registerPrimitive(self, primitive):
-        self.primitives.append(primitive)
-
-    def unregisterPrimitive(self, primitive):
-        if primitive in self.primitives:
-            self.primitives.remove(primitive)
+        self._sizes = self._perPoint(sizes, self.size, len(self), 'f')
+        self.isDirty = True
 
-    def drawCurve(self, points, degree=None, color=None, width=2):
+    def append(self, positions, colors=None, sizes=None):
         """
-        Convenience method creating and registering a `CurvePrim`.
+        Adds new points at the end of the point cloud, `colors` and `sizes`
+        can be a single value applied to all new points (or one per point).
         """
-        curve = CurvePrim(points, degree, color, width)
-        self.registerPrimitive(curve)
-        return curve
+        positions = _floatArray(positions)
+        count = len(positions) // 3
+        colors = self._perPoint(colors, self.color, count)
+        sizes = self._perPoint(sizes, self.size, count, 'f')
+        self._positions = _ownArray(self._positions)
+        self._colors = _ownArray(self._colors)
+        self._sizes = _ownArray(self._sizes)
+        self._positions.extend(positions)
+        self._colors.extend(colors)
+        self._sizes.extend(sizes)
+        self.isDirty = True
+        return count
 
-    def drawTransform(self, transform=None):
+    def remove(self, mask):
         """
-        Convenience method creating and registering a `TransformPrim`.
+        Removes all points whose `mask` value is `True` (mask is expected to
+        have one value per point), returns the number of points left.
         """
-        xfo = TransformPrim(transform)
-        self.registerPrimitive(xfo)
-        return xfo
+        keep = _unmasked(mask, len(self))
+        if keep is not None:
+            self._compact(keep)
+            self.isDirty = True
+        return len(self)
 
-    def drawPoint(self, position=None, color=None, size=2):
+    def _compact(self, keep):
+        # Keeps only the points at the `keep` indices.
+        self._positions = _gatherArray(self._positions, keep, 3)
+        self._colors = _gatherArray(self._colors, keep, 3)
+        self._sizes = _gatherArray(self._sizes, keep, 1)
+
+    def clear(self):
+        self._positions = array.array('d')
+        self._colors = array.array('d')
+        self._sizes = array.array('f')
+        self.isDirty = True
+
+    def snapshot(self):
         """
-        Convenience method creating and registering a `PointPrim`.
+        Returns a copy of the arrays backing the point cloud as a dictionary
+        (see `restore` and `FrameCache`).
         """
-        point = PointPrim(position, color, size)
-        self.registerPrimitive(point)
-        return point
+        return _copySnapshot(dict(positions=self._positions,
+                                  colors=self._colors, sizes=self._sizes))
 
-    def drawTriangle(self, points, colors):
-        triangle = TrianglePrim(points, colors)
-        self.registerPrimitive(triangle)
-        return triangle
+    def restore(self, snapshot, copy=True):
+        """
+        Restores a `snapshot`, its arrays are used as they are (not copied)
+        unless `copy`.
+        """
+        snapshot = _copySnapshot(snapshot) if copy else snapshot
+        self._positions = snapshot['positions']
+        self._colors = snapshot['colors']
+        self._sizes = snapshot['sizes']
+        self.isDirty = True
 
     @staticmethod
-    def getCurrentModelPanel():
-        currentModelPanel = mc.getPanel(wf=True)
-        if "modelPanel" not in currentModelPanel:
-            currentModelPanel = mc.getPanel(vis=True)
-            for each in currentModelPanel:
-                if "modelPanel" in each:
-                    currentModelPanel = each
-        return currentModelPanel
+    def _perPoint(values, default, count, typecode='d'):
+        # Colors (typecode 'd', 3 floats each) or sizes ('f') of `count`
+        # points, either a single value or one per point.
+        if values is None:
+            values = default
+        if isinstance(values, (int, float)):
+            return array.array(typecode, (values,)) * count
+        if typecode == 'd':
+            return _checkInstances(_floatArray(values), count, 'colors', 3)
+        return _checkInstances(array.array(typecode, values), count, 'sizes')
+
+    def update(self):
+        super(PointCloudPrim, self).update()
+        positions = _transformArray(self._positions,
+                                    self.worldMatrix)
+        sizes = _distinct(self._sizes)
+        if len(sizes) < 2:
+            buffer = VertexBuffer()
+            buffer.setArrays(positions, self._colors)
+            self._buffers = [(sizes[0], buffer)] if sizes else []
+            return
+
+        # one buffer per distinct size
+        self._buffers = list()
+        for size, indices in _groupIndices(self._sizes):
+            buffer = VertexBuffer()
+            buffer.setArrays(_gatherArray(positions, indices, 3),
+                             _gatherArray(self._colors, indices, 3))
+            self._buffers.append((size, buffer))
+
+    def drawItems(self):
+        return [DrawItem(omr.MGL_POINTS, size, None, buffer)
+                for size, buffer in self._buffers]
+
+
+# === Particle System Primitive ===
+
+# Particles are simulated as a whole: their state is stored as a structure
+# of arrays (positions, velocities, ages and state ids), emitters and forces
+# work on all the particles of a state at once (as NumPy array operations
+# when available) and dead particles are removed by compacting the arrays.
+#
+# Forces are called as `force(positions, velocities, ages)`, where positions
+# and velocities are packed points ((N, 3) NumPy arrays if available, lists
+# of [x, y, z] lists otherwise). Forces might modify them in place and
+# return an acceleration (a single vector or one per particle), or `None`.
+
+class ParticleEmitter(object):
+    """
+    Emits `rate` particles per simulation step at `position`, moving at
+    `velocity` plus a random offset in between `-spread` and `spread` (per
+    axis) if given.
+
+    Any function returning packed (positions, velocities) can be used as an
+    emitter (see `ParticlePrim.addEmitter`).
+    """
+    def __init__(self, position=(0.0, 0.0, 0.0), velocity=(0.0, 1.0, 0.0),
+                 rate=20, spread=None):
+        self.position = position
+        self.velocity = velocity
+        self.rate = rate
+        self.spread = spread
+
+    def __call__(self):
+        count = int(self.rate)
+        position = tuple(self.position)[:3]
+        velocity = tuple(self.velocity)[:3]
+        if np is not None:
+            positions = np.tile(np.array(position, dtype=float), (count, 1))
+            velocities = np.tile(np.array(velocity, dtype=float), (count, 1))
+            if self.spread is not None:
+                velocities += np.random.uniform(-1.0, 1.0, (count, 3)) * \
+                    np.array(tuple(self.spread)[:3], dtype=float)
+            return positions, velocities
+        spread = (0.0, 0.0, 0.0) if self.spread is None else self.spread
+        velocities = [[v + random.uniform(-s, s)
+                       for v, s in zip(velocity, spread)]
+                      for i in xrange(count)]
+        return [position] * count, velocities
+
+
+def dragForce(coefficient=0.1):
+    """
+    Returns a force slowing particles down proportionally to their speed.
+    """
+    def drag(positions, velocities, ages):
+        if np is not None and isinstance(velocities, np.ndarray):
+            return velocities * -coefficient
+        return [[-coefficient * x for x in v] for v in velocities]
+    return drag
+
+
+def bounceForce(height=0.0, restitution=0.5, callback=None):
+    """
+    Returns a force bouncing particles off a ground plane at `height` (Y
+    axis), keeping `restitution` of their vertical speed. The positions of
+    the bouncing particles are passed to `callback` (i.e. to emit
+    particles on collision).
+    """
+    def bounce(positions, velocities, ages):
+        if np is not None and isinstance(positions, np.ndarray):
+            hits = positions[:, 1] <= height
+            result = np.zeros_like(velocities)
+            result[hits, 1] = -(1.0 + restitution) * velocities[hits, 1]
+            positions[hits, 1] = height
+            if callback is not None and hits.any():
+                callback(positions[hits])
+            return result
+        result = list()
+        hits = list()
+        for p, v in zip(positions, velocities):
+            if p[1] > height:
+                result.append((0.0, 0.0, 0.0))
+                continue
+            result.append((0.0, -(1.0 + restitution) * v[1], 0.0))
+            p[1] = height
+            hits.append(tuple(p))
+        if callback is not None and hits:
+            callback(hits)
+        return result
+    return bounce
+
+
+class ParticlePrim(PointCloudPrim):
+    """
+    Particle system drawn as a point cloud. Particles belong to a state
+    (see `addState`) defining their emitters, forces, age limit, color and
+    size, state 0 is created by default.
+
+    `step` advances the simulation by a given time, while `simulate` does it
+    up to a given frame (i.e. from a `SceneManager` callback).
+    """
+    def __init__(self, color=None, size=2, startFrame=1):
+        super(ParticlePrim, self).__init__(color=color, size=size)
+        self.startFrame = startFrame
+        self.frame = None  # last simulated frame
+        self._velocities = array.array('d')  # x, y, z, x, y, z...
+        self._ages = array.array('d')
+        self._stateIds = array.array('i')
+        self._states = list()
+        self._pending = None  # particles emitted in the middle of a step
+        # `cache` keeps the simulated frames when set to a `FrameCache`,
+        # scrubbing replays them instead of simulating again.
+        self.cache = None
+        self.addState()
+
+    # `velocities`, `ages` and `stateIds` are the arrays backing the
+    # particles (along with `positions`, `colors` and `sizes`), they should
+    # be considered read only.
+    @property
+    def velocities(self):
+        return self._velocities
+
+    @property
+    def ages(self):
+        return self._ages
+
+    @property
+    def stateIds(self):
+        return self._stateIds
+
+    def addState(self, color=None, size=None, ageLimit=None):
+        """
+        Adds a new particle state (the particle's `color` and `size` default
+        to the primitive ones), returns its index.
+        """
+        self._states.append(_ParticleState(
+            color or self.color, size or self.size, ageLimit))
+        self.invalidate()
+        return len(self._states) - 1
+
+    def addEmitter(self, emitter, state=0):
+        self._states[state].emitters.append(emitter)
+        self.invalidate()
+
+    def addForce(self, force, state=0):
+        self._states[state].forces.append(force)
+        self.invalidate()
+
+    def setAgeLimit(self, value, state=0):
+        self._states[state].ageLimit = value
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drops the cached frames (if any), it should be called after changing
+        the simulation (i.e. the `rate` of an emitter).
+        """
+        if self.cache is not None:
+            self.cache.clear()
+
+    def append(self, positions, colors=None, sizes=None):
+        count = super(ParticlePrim, self).append(positions, colors, sizes)
+        self._velocities = _ownArray(self._velocities)
+        self._ages = _ownArray(self._ages)
+        self._stateIds = _ownArray(self._stateIds)
+        self._velocities.extend(array.array('d', (0.0,)) * (count * 3))
+        self._ages.extend(array.array('d', (0.0,)) * count)
+        self._stateIds.extend(array.array('i', (0,)) * count)
+        return count
+
+    def emit(self, positions, velocities=None, state=0):
+        """
+        Adds new particles on a given `state`, particles emitted while
+        stepping (i.e. by a force) are added at the end of the step.
+        """
+        if self._pending is not None:
+            self._pending.append((positions, velocities, state))
+            return
+        data = self._states[state]
+        count = self.append(positions, data.color, data.size)
+        if not count:
+            return
+        start = len(self) - count
+        if velocities is not None:
+            self._velocities[start * 3:] = _floatArray(velocities)
+        self._stateIds[start:] = array.array('i', (state,)) * count
+
+    def _compact(self, keep):
+        super(ParticlePrim, self)._compact(keep)
+        self._velocities = _gatherArray(self._velocities, keep, 3)
+        self._ages = _gatherArray(self._ages, keep, 1)
+        self._stateIds = _gatherArray(self._stateIds, keep, 1)
+
+    def clear(self):
+        super(ParticlePrim, self).clear()
+        self._velocities = array.array('d')
+        self._ages = array.array('d')
+        self._stateIds = array.array('i')
+
+    def snapshot(self):
+        result = super(ParticlePrim, self).snapshot()
+        result.update(_copySnapshot(dict(velocities=self._velocities,
+                                         ages=self._ages,
+                                         stateIds=self._stateIds)))
+        return result
+
+    def restore(self, snapshot, copy=True):
+        snapshot = _copySnapshot(snapshot) if copy else snapshot
+        super(ParticlePrim, self).restore(snapshot, copy=False)
+        self._velocities = snapshot['velocities']
+        self._ages = snapshot['ages']
+        self._stateIds = snapshot['stateIds']
+
+    def step(self, dt=1.0):
+        """
+        Advances the simulation by `dt`: particles get emitted, accelerated
+        by the forces of their state and moved, the ones older than the age
+        limit of their state are removed.
+        """
+        for index, data in enumerate(self._states):
+            for emitter in data.emitters:
+                positions, velocities = emitter()
+                self.emit(positions, velocities, index)
+
+        self._pending = list()
+        try:
+            self._integrate(dt)
+        finally:
+            pending, self._pending = self._pending, None
+        limits = [x.ageLimit for x in self._states]
+        if any(x is not None for x in limits):
+            self.remove(_expired(self._ages, self._stateIds, limits))
+        for each in pending:
+            self.emit(*each)
+        self.isDirty = True
+
+    def _integrate(self, dt):
+        positions = _particlePoints(self._positions)
+        velocities = _particlePoints(self._velocities)
+        ages = _particleValues(self._ages)
+        for index, data in enumerate(self._states):
+            if not data.forces:
+                continue
+            if len(self._states) == 1:
+                selection = None  # all particles, no need to gather
+                p, v, a = positions, velocities, ages
+            else:
+                selection = _stateSelection(self._stateIds, index)
+                if not len(selection):
+                    continue
+                p, v, a = [_selectParticles(x, selection)
+                           for x in (positions, velocities, ages)]
+            for force in data.forces:
+                acceleration = force(p, v, a)
+                if acceleration is not None:
+                    _addScaled(v, acceleration, dt)
+            if selection is not None and np is not None:
+                positions[selection] = p
+                velocities[selection] = v
+        _addScaled(positions, velocities, dt)
+        self._positions = _floatArray(positions)
+        self._velocities = _floatArray(velocities)
+        self._ages = array.array('d', (x + dt for x in self._ages)) \
+            if np is None else _toArray(ages + dt)
+
+    def simulate(self, frame):
+        """
+        Simulates up to `frame`, a step per frame. Going back to the
+        `startFrame` (or any frame already simulated) restarts the
+        simulation, from the closest cached frame if there's a `cache`.
+        """
+        frame = int(frame)
+        if self.frame is None or frame <= self.startFrame or \
+                frame < self.frame:
+            self.clear()
+            self.frame = self.startFrame
+        cache = self.cache
+        if cache is not None:
+            nearest = cache.nearest(frame)
+            if nearest is not None and nearest > self.frame:
+                self.restore(cache.get(nearest))
+                self.frame = nearest
+        while self.frame < frame:
+            self.step()
+            self.frame += 1
+            if cache is not None:
+                cache.store(self.frame, self.snapshot())
+
+
+class _ParticleState(object):
+    def __init__(self, color, size, ageLimit=None):
+        self.color = color
+        self.size = size
+        self.ageLimit = ageLimit
+        self.emitters = list()
+        self.forces = list()
+
+
+def _particlePoints(values):
+    # Unpacks a flat array as mutable packed points (see `ParticlePrim`).
+    if np is not None:
+        return np.frombuffer(values, dtype=float).reshape(-1, 3).copy()
+    it = iter(values)
+    return [list(x) for x in zip(it, it, it)]
+
+
+def _particleValues(values):
+    if np is not None:
+        return np.frombuffer(values, dtype=_typecode(values)).copy()
+    return list(values)
+
+
+def _stateSelection(stateIds, state):
+    # Indices of the particles on a given `state`.
+    if np is not None:
+        return np.nonzero(_particleValues(stateIds) == state)[0]
+    return [i for i, x in enumerate(stateIds) if x == state]
+
+
+def _selectParticles(values, selection):
+    # (lists keep sharing their [x, y, z] items, so changes are visible)
+    if np is not None:
+        return values[selection]
+    return [values[i] for i in selection]
+
+
+def _addScaled(target, values, scale):
+    # Adds `values` (a vector or one per element) times `scale` to the
+    # packed points in `target` (in place).
+    if np is not None and isinstance(target, np.ndarray):
+        target += np.asarray(values, dtype=float) * scale
+        return
+    if len(values) and not _isIterable(values[0]):
+        values = itertools.repeat(values)
+    for p, v in zip(target, values):
+        p[0] += v[0] * scale
+        p[1] += v[1] * scale
+        p[2] += v[2] * scale
+
+
+def _expired(ages, stateIds, limits):
+    # Mask of the particles older than the age limit of their state.
+    if np is not None:
+        limits = np.array([np.inf if x is None else x for x in limits])
+        return _particleValues(ages) > limits[_particleValues(stateIds)]
+    return [limits[s] is not None and age > limits[s]
+            for age, s in zip(ages, stateIds)]
+
+
+# === Frame cache ===
+
+# Callback driven primitives (i.e. simulations) can keep their state per
+# frame on a `FrameCache`, so scrubbing the timeline or playing it in a loop
+# replays cached frames instead of computing them again. A frame is stored
+# as a snapshot, a dictionary of arrays (see `PointCloudPrim.snapshot`).
+
+class FrameCache(object):
+    """
+    Frame snapshots kept in memory up to `budget` bytes, the least recently
+    used ones get evicted when going over budget. If a `directory` is given
+    evicted snapshots are spilled to disk instead (read back through memory
+    mapped files).
+
+    Spilled files are removed by `clear`, when the cache gets collected or
+    at exit (whatever comes first).
+    """
+    def __init__(self, budget=256 * 1024 * 1024, directory=None):
+        self.budget = budget
+        self.directory = directory
+        self._frames = collections.OrderedDict()  # frame: snapshot (LRU)
+        self._spilled = dict()  # frame: path
+        self._size = 0
+        _frameCaches.add(
+            weakref.ref(self, _removeSpilled(self._spilled)))
+
+    def __len__(self):
+        return len(set(self._frames).union(self._spilled))
+
+    def __contains__(self, frame):
+        return frame in self._frames or frame in self._spilled
+
+    # `size` in bytes of the snapshots kept in memory.
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def frames(self):
+        return sorted(set(self._frames).union(self._spilled))
+
+    def nearest(self, frame):
+        """
+        Returns the closest cached frame at or before `frame` (`None` if
+        there isn't any).
+        """
+        frames = [x for x in self._frames if x <= frame]
+        frames.extend(x for x in self._spilled if x <= frame)
+        return max(frames) if frames else None
+
+    def store(self, frame, snapshot):
+        self._discard(frame)
+        self._frames[frame] = snapshot
+        self._size += _snapshotSize(snapshot)
+        self._evict()
+
+    def get(self, frame, default=None):
+        """
+        Returns the snapshot of `frame` (making it the most recently used),
+        loading it from disk if needed.
+        """
+        snapshot = self._frames.pop(frame, None)
+        if snapshot is not None:
+            self._frames[frame] = snapshot
+            return snapshot
+        path = self._spilled.get(frame)
+        if path is None:
+            return default
+        snapshot = _loadArrays(path)
+        self._frames[frame] = snapshot
+        self._size += _snapshotSize(snapshot)
+        self._evict()
+        return snapshot
+
+    def clear(self):
+        # (snapshots read back from disk are views of the mapped files, they
+        # are dropped first so the files can be removed)
+        self._frames = collections.OrderedDict()
+        self._size = 0
+        for path in self._spilled.values():
+            _removeFile(path)
+        self._spilled.clear()
+
+    def _discard(self, frame):
+        snapshot = self._frames.pop(frame, None)
+        if snapshot is not None:
+            self._size -= _snapshotSize(snapshot)
+        path = self._spilled.pop(frame, None)
+        if path is not None:
+            _removeFile(path)
+
+    def _evict(self):
+        # (the most recently used snapshot is always kept)
+        while self._size > self.budget and len(self._frames) > 1:
+            frame, snapshot = self._frames.popitem(last=False)
+            self._size -= _snapshotSize(snapshot)
+            if self.directory is not None and frame not in self._spilled:
+                fd, path = tempfile.mkstemp(suffix='.mscache',
+                                            dir=self.directory)
+                with os.fdopen(fd, 'wb') as f:
+                    _writeArrays(f, snapshot)
+                self._spilled[frame] = path
+
+
+# Weak references to every `FrameCache`, their spilled files get removed
+# once collected or at exit.
+_frameCaches = set()
+
+
+def _removeSpilled(spilled):
+    # Removes the files of `spilled` (frame: path) once the cache owning it
+    # is collected.
+    def remove(ref):
+        _frameCaches.discard(ref)
+        for path in spilled.values():
+            _removeFile(path)
+        spilled.clear()
+    return remove
+
+
+@atexit.register
+def _clearFrameCaches():
+    for ref in list(_frameCaches):
+        cache = ref()
+        if cache is not None:
+            cache.clear()
+
+
+def _copySnapshot(snapshot):
+    return dict((name, _arrayCopy(values))
+                for name, values in snapshot.items())
+
+
+def _snapshotSize(snapshot):
+    return sum(len(x) * x.itemsize for x in snapshot.values())
+
+
+def _removeFile(path):
+    # Removes `path` if it exists, failures are logged (i.e. files still
+    # mapped on Windows).
+    try:
+        os.remove(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            logger.warning('Could not remove {}: {}'.format(path, e))
+
+
+# Arrays are stored on disk as a header (magic bytes, the length of a
+# JSON description of the arrays: name, typecode, offset and length) and
+# the raw array data, aligned to 8 bytes.
+_ARRAYS_MAGIC = b'MSCA'
+_ARRAYS_HEADER = struct.Struct('<4sI')
+
+
+def _writeArrays(f, arrays):
+    names = sorted(arrays)
+    description = list()
+    offset = 0
+    for name in names:
+        values = arrays[name]
+        description.append((name, _typecode(values), offset, len(values)))
+        offset += -(-len(values) * values.itemsize // 8) * 8
+    header = json.dumps(description).encode('utf-8')
+    header += b' ' * (-(_ARRAYS_HEADER.size + len(header)) % 8)
+    f.write(_ARRAYS_HEADER.pack(_ARRAYS_MAGIC, len(header)))
+    f.write(header)
+    for name in names:
+        data = _arrayBytes(arrays[name])
+        f.write(data)
+        f.write(b'\0' * (-len(data) % 8))
+
+
+def _readArrays(buffer, offset=0):
+    # Reads the arrays stored at `offset` of `buffer` (i.e. a memory mapped
+    # file), returns a dictionary and the offset past the arrays.
+    # (the block is validated before reading anything, corrupt or
+    # truncated blocks raise `ValueError`)
+    if len(buffer) - offset < _ARRAYS_HEADER.size:
+        raise ValueError('Truncated mscreen arrays block')
+    magic, length = _ARRAYS_HEADER.unpack_from(buffer, offset)
+    if magic != _ARRAYS_MAGIC:
+        raise ValueError('Not a mscreen arrays block')
+    offset += _ARRAYS_HEADER.size
+    if offset + length > len(buffer):
+        raise ValueError('Truncated mscreen arrays block')
+    description = json.loads(buffer[offset:offset + length].decode('utf-8'))
+    offset += length
+    result = dict()
+    end = offset
+    for entry in description:
+        try:
+            name, typecode, start, count = entry
+            typecode = str(typecode)  # (unicode on Python 2)
+            itemsize = array.array(typecode).itemsize
+            start, count = int(start), int(count)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid mscreen array: {!r}'.format(entry))
+        start += offset
+        size = count * itemsize
+        if start < offset or count < 0 or start + size > len(buffer):
+            raise ValueError('Truncated mscreen array: {}'.format(name))
+        result[str(name)] = _bufferArray(typecode, buffer, start, size)
+        end = max(end, start + -(-size // 8) * 8)
+    return result, end
+
+
+def _bufferArray(typecode, buffer, start, size):
+    # Returns `size` bytes of `buffer` from `start` as an array. With NumPy
+    # it's a read only view (no copy), which keeps `buffer` alive. Without
+    # it the bytes get copied into a new `array.array` (through a memory
+    # view on Python 3, avoiding an intermediate copy).
+    if np is not None:
+        return np.frombuffer(buffer, dtype=typecode,
+                             count=size // np.dtype(typecode).itemsize,
+                             offset=start)
+    if not hasattr(array.array, 'frombytes'):  # Python 2
+        return array.array(typecode, buffer[start:start + size])
+    values = array.array(typecode)
+    view = memoryview(buffer)
+    try:
+        values.frombytes(view[start:start + size])
+    finally:
+        view.release()
+    return values
+
+
+def _mapFile(path):
+    # Maps a file in memory (read only). With NumPy the map stays open as
+    # long as any array read from it does (see `_bufferArray`), otherwise
+    # it should be closed once read.
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _loadArrays(path):
+    buffer = _mapFile(path)
+    try:
+        return _readArrays(buffer)[0]
+    finally:
+        if np is None:
+            buffer.close()
+
+
+def _arrayBytes(values):
+    return values.tobytes() if hasattr(values, 'tobytes') else \
+        values.tostring()
+
+
+# === Baked Primitive ===
+class BakedPrim(Primitive):
+    """
+    Primitive drawing a fixed set of items, it's how primitives without a
+    snapshot of their own get loaded from a scene file (see
+    `SceneManager.save`). `source` is the type name of the original
+    primitive.
+
+    Items are (mode, size, color, arrays) tuples, `arrays` being a
+    dictionary of `VertexBuffer` arrays (`vertices`, `colors`, `normals`
+    and `indices`) relative to the primitive's `transform`.
+    """
+    def __init__(self, items=None, source=None):
+        super(BakedPrim, self).__init__()
+        self.source = source
+        self._items = list(items or ())
+        self._prepared = list()
+        self.isDirty = True
+
+    @property
+    def items(self):
+        return self._items
+
+    def update(self):
+        super(BakedPrim, self).update()
+        matrix = self.worldMatrix
+        self._prepared = list()
+        for mode, size, color, arrays in self._items:
+            normals = arrays.get('normals')
+            if normals is not None and tuple(matrix) != _IDENTITY:
+                normals = _floatArray(_transformNormals(
+                    _flatPoints(normals), matrix))
+            buffer = VertexBuffer()
+            buffer.setArrays(_transformArray(arrays['vertices'], matrix),
+                             arrays.get('colors'), arrays.get('indices'),
+                             normals)
+            self._prepared.append(DrawItem(mode, size, color, buffer))
+
+    def drawItems(self):
+        return self._prepared
+
+
+# === Scene files ===
+
+# `SceneManager.save` writes the registered primitives to a binary file: a
+# header (magic bytes, format version and the length of a JSON description
+# of the primitives) followed by all their arrays as a single arrays block
+# (see `Frame cache`). Loading maps the file in memory: with NumPy the
+# loaded arrays are read only views of the map (no copy, the map stays open
+# while any of them is alive) and get copied only when modified in place
+# (i.e. appending points). Without NumPy they're copied out of the map.
+# Either way no Python object is created per point.
+#
+# Point clouds (and particles) are stored as their own arrays and world
+# matrix, any other primitive gets baked as the draw items it has at the
+# time of saving (in world space) and loaded as a `BakedPrim`.
+SCENE_VERSION = 1
+_SCENE_MAGIC = b'MSCS'
+_SCENE_HEADER = struct.Struct('<4sII')
+_BUFFER_ARRAYS = ('vertices', 'colors', 'normals', 'indices')
+
+
+def _snapshotTypes():
+    return dict((x.__name__, x) for x in (PointCloudPrim, ParticlePrim))
+
+
+def _saveScene(path, primitives):
+    types = _snapshotTypes()
+    records = list()
+    arrays = dict()
+    for each in primitives:
+        name = type(each).__name__
+        record = dict(type=name, layer=each._layer)
+        prefix = '{}/'.format(len(records))
+        if name in types:
+            record.update(matrix=list(each.worldMatrix),
+                          color=list(each.color), size=each.size)
+            for key, values in each.snapshot().items():
+                arrays[prefix + key] = values
+        else:
+            items = each.drawItems()
+            if items is None:
+                logger.warning('Unable to save {}, it draws itself'.format(
+                    each))
+                continue
+            record['items'] = list()
+            for i, item in enumerate(items):
+                record['items'].append((item.mode, item.size, item.color))
+                for key in _BUFFER_ARRAYS:
+                    values = getattr(item.buffer, key)
+                    if values is not None:
+                        arrays['{}{}/{}'.format(prefix, i, key)] = values
+        records.append(record)
+
+    header = json.dumps(records).encode('utf-8')
+    header += b' ' * (-(_SCENE_HEADER.size + len(header)) % 8)
+    with open(path, 'wb') as f:
+        f.write(_SCENE_HEADER.pack(_SCENE_MAGIC, SCENE_VERSION, len(header)))
+        f.write(header)
+        _writeArrays(f, arrays)
+    return len(records)
+
+
+def _loadScene(path):
+    # Returns the primitives stored on a scene file as (primitive, layer)
+    # pairs.
+    buffer = _mapFile(path)
+    try:
+        if len(buffer) < _SCENE_HEADER.size:
+            raise ValueError('Not a mscreen scene: {}'.format(path))
+        magic, version, length = _SCENE_HEADER.unpack_from(buffer)
+        if magic != _SCENE_MAGIC:
+            raise ValueError('Not a mscreen scene: {}'.format(path))
+        if version > SCENE_VERSION:
+            raise ValueError('Unsupported scene version: {}'.format(
+                version))
+        offset = _SCENE_HEADER.size
+        records = json.loads(buffer[offset:offset + length].decode('utf-8'))
+        arrays = _readArrays(buffer, offset + length)[0]
+    finally:
+        if np is None:
+            buffer.close()
+
+    grouped = dict()  # record index: {array name: array}
+    for key, values in arrays.items():
+        index, _, name = key.partition('/')
+        grouped.setdefault(int(index), dict())[name] = values
+
+    types = _snapshotTypes()
+    result = list()
+    for index, record in enumerate(records):
+        arrays = grouped.get(index, dict())
+        layer = record.get('layer')
+        layer = None if layer is None else str(layer)
+        if 'items' not in record:
+            primitive = types[record['type']](color=tuple(record['color']),
+                                              size=record['size'])
+            primitive.restore(arrays, copy=False)
+            primitive.transform = om2.MTransformationMatrix(
+                om2.MMatrix(record['matrix']))
+            result.append((primitive, layer))
+            continue
+        items = list()
+        for i, (mode, size, color) in enumerate(record['items']):
+            items.append((mode, size, None if color is None else
+                          tuple(color), dict(
+                              (key, arrays.get('{}/{}'.format(i, key)))
+                              for key in _BUFFER_ARRAYS)))
+        result.append((BakedPrim(items, str(record['type'])), layer))
+    return result
+
+
+# === Streaming ===
+
+# External processes (i.e. solvers running next to Maya) can feed
+# primitives through a local socket or a pipe. The feed is a sequence of
+# framed binary messages: a header (magic bytes, operation, kind of
+# primitive, handle and payload length) followed by an arrays block (see
+# `Frame cache`) with `positions` and optionally `colors` (per point),
+# `sizes` (per point), `color` and `size`.
+#
+# Handles are chosen by the producer and are local to a stream, a message
+# either updates (replacing all its points), appends points to or erases
+# the primitive behind a handle, creating it if needed. Messages are
+# decoded on a background thread and applied as a batch at the next draw
+# (see `StreamReceiver`). `StreamWriter` implements the producer side.
+
+# Stream primitive kinds: points (`PointCloudPrim`) or a polyline
+# (linear `CurvePrim`).
+STREAM_POINTS = 0
+STREAM_LINES = 1
+
+_STREAM_UPDATE = 0
+_STREAM_APPEND = 1
+_STREAM_ERASE = 2
+_STREAM_OPS = (_STREAM_UPDATE, _STREAM_APPEND, _STREAM_ERASE)
+_STREAM_MAGIC = b'MS'
+_STREAM_HEADER = struct.Struct('<2sBBII')
+
+
+class StreamWriter(object):
+    """
+    Producer side of a stream, encodes messages to a `target`: a connected
+    socket, a file object opened for writing (i.e. a named pipe) or anything
+    with `sendall`/`write`.
+    """
+    def __init__(self, target):
+        self.target = target
+        self._write = getattr(target, 'sendall', None) or target.write
+
+    @classmethod
+    def connect(cls, address):
+        """
+        Returns a writer connected to a `StreamServer` at `address`.
+        """
+        return cls(socket.create_connection(address)
+                   if isinstance(address, tuple) else _unixSocket(address))
+
+    def update(self, handle, positions, colors=None, sizes=None, color=None,
+               size=None, kind=STREAM_POINTS):
+        self._send(_STREAM_UPDATE, kind, handle, positions, colors, sizes,
+                   color, size)
+
+    def append(self, handle, positions, colors=None, sizes=None,
+               kind=STREAM_POINTS):
+        self._send(_STREAM_APPEND, kind, handle, positions, colors, sizes)
+
+    def erase(self, handle):
+        self._send(_STREAM_ERASE, STREAM_POINTS, handle)
+
+    def close(self):
+        self.target.close()
+
+    def _send(self, op, kind, handle, positions=None, colors=None,
+              sizes=None, color=None, size=None):
+        arrays = dict()
+        for name, values in (('positions', positions), ('colors', colors),
+                             ('color', color)):
+            if values is not None:
+                arrays[name] = _floatArray(values)
+        for name, values in (('sizes', sizes), ('size', size)):
+            if values is None:
+                continue
+            if not _isIterable(values):
+                values = (values,)
+            arrays[name] = array.array('f', values)
+        payload = io.BytesIO()
+        if arrays:
+            _writeArrays(payload, arrays)
+        payload = payload.getvalue()
+        self._write(_STREAM_HEADER.pack(_STREAM_MAGIC, op, kind, handle,
+                                        len(payload)) + payload)
+        if hasattr(self.target, 'flush'):
+            self.target.flush()
+
+
+class StreamReceiver(object):
+    """
+    Consumer side of a stream feeding a `SceneManager` (see
+    `SceneManager.stream`). Messages from `source` (a connected socket, a
+    file object, a file descriptor or the path of a named pipe) are decoded
+    on a background thread and queued, `apply` runs them on the scene.
+
+    Primitives get registered on `layer`, `primitives` maps the stream
+    handles to them.
+    """
+    def __init__(self, scene, source, layer=None):
+        self.scene = scene
+        self.layer = layer
+        self.primitives = dict()
+        self._source = source
+        self._queue = collections.deque()  # (op, kind, handle, arrays)
+        self._thread = threading.Thread(target=self._receive,
+                                        name='mscreenStream')
+        self._thread.daemon = True
+        self._running = False
+
+    # `isAlive` is `True` while the stream is being read.
+    @property
+    def isAlive(self):
+        return self._thread.is_alive()
+
+    # `pending` is the number of decoded messages waiting for `apply`.
+    @property
+    def pending(self):
+        return len(self._queue)
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._close()
+
+    def _close(self):
+        source, self._source = self._source, None
+        if source is None or isinstance(source, basestring):
+            return
+        try:
+            if isinstance(source, int):
+                os.close(source)
+                return
+            if hasattr(source, 'shutdown'):
+                source.shutdown(socket.SHUT_RDWR)
+            source.close()
+        except (OSError, IOError, socket.error):
+            pass
+
+    def _receive(self):
+        source = self._source
+        if isinstance(source, basestring):  # named pipe
+            source = self._source = open(source, 'rb')
+        if isinstance(source, int):
+            read = functools.partial(os.read, source)
+        else:
+            read = getattr(source, 'recv', None) or source.read
+        try:
+            while self._running:
+                header = _readExactly(read, _STREAM_HEADER.size)
+                if header is None:
+                    break
+                magic, op, kind, handle, length = \
+                    _STREAM_HEADER.unpack(header)
+                if magic != _STREAM_MAGIC or op not in _STREAM_OPS or \
+                        kind not in (STREAM_POINTS, STREAM_LINES):
+                    raise ValueError('Invalid stream message')
+                payload = _readExactly(read, length) if length else b''
+                if payload is None:
+                    raise ValueError('Truncated stream message')
+                arrays = _readArrays(payload)[0] if payload else dict()
+                self._queue.append((op, kind, handle, arrays))
+                self.scene._requestStreamRefresh()
+        except (OSError, IOError, ValueError, struct.error,
+                socket.error) as e:
+            if self._running:
+                logger.error('Stream error, disconnecting: {}'.format(e))
+        finally:
+            self._running = False
+            self._close()
+
+    def apply(self):
+        """
+        Applies the queued messages, returns how many. Updates and erases
+        make previous messages on the same handle irrelevant, those are
+        skipped.
+        """
+        messages = list()
+        while self._queue:
+            messages.append(self._queue.popleft())
+        last = dict()
+        for i, (op, kind, handle, arrays) in enumerate(messages):
+            if op != _STREAM_APPEND:
+                last[handle] = i
+        for i, (op, kind, handle, arrays) in enumerate(messages):
+            if i < last.get(handle, i):
+                continue
+            if op == _STREAM_ERASE:
+                primitive = self.primitives.pop(handle, None)
+                if primitive is not None and primitive._handle is not None:
+                    self.scene.unregisterPrimitive(primitive)
+                continue
+            primitive = self.primitives.get(handle)
+            if primitive is None or primitive._scene is not self.scene or \
+                    op == _STREAM_UPDATE:
+                primitive = self._primitive(handle, kind, primitive)
+            try:
+                _applyStreamArrays(primitive, arrays, op == _STREAM_APPEND)
+            except ValueError as e:  # i.e. colors not matching positions
+                logger.error('Invalid stream message ({}): {}'.format(
+                    handle, e))
+        return len(messages)
+
+    def _primitive(self, handle, kind, previous):
+        # Returns an empty primitive of a given `kind` for `handle`, reusing
+        # the `previous` one when possible.
+        cls = PointCloudPrim if kind == STREAM_POINTS else CurvePrim
+        if type(previous) is not cls or previous._scene is not self.scene:
+            if previous is not None and previous._handle is not None:
+                self.scene.unregisterPrimitive(previous)
+            previous = cls()
+            self.scene.registerPrimitive(previous, self.layer)
+        elif kind == STREAM_POINTS:
+            previous.clear()
+        self.primitives[handle] = previous
+        return previous
+
+
+class StreamServer(object):
+    """
+    Accepts stream connections on `address`, a (host, port) pair (port 0
+    picks any free port) or the path of a Unix socket. Every connection is
+    read by its own `StreamReceiver`.
+    """
+    def __init__(self, scene, address=('127.0.0.1', 0), layer=None):
+        self.scene = scene
+        self.layer = layer
+        if isinstance(address, tuple):
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.SOL_SOCKET,
+                                    socket.SO_REUSEADDR, 1)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(address)
+        self._socket.listen(8)
+        # `address` is the actual address listened (i.e. the port picked)
+        self.address = self._socket.getsockname()
+        self._thread = threading.Thread(target=self._accept,
+                                        name='mscreenStreamServer')
+        self._thread.daemon = True
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        try:
+            self._socket.close()
+        except (OSError, socket.error):
+            pass
+        if not isinstance(self.address, tuple):
+            _removeFile(self.address)
+
+    def _accept(self):
+        while self._running:
+            try:
+                connection = self._socket.accept()[0]
+            except (OSError, socket.error):
+                break
+            self.scene.stream(connection, self.layer)
+
+
+def _unixSocket(path):
+    result = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    result.connect(path)
+    return result
+
+
+def _readExactly(read, count):
+    # Reads `count` bytes, `None` if the stream ends before.
+    chunks = list()
+    while count:
+        chunk = read(count)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        count -= len(chunk)
+    return b''.join(chunks)
+
+
+def _applyStreamArrays(primitive, arrays, append):
+    # (empty `color` and `size` arrays are ignored)
+    color = arrays.get('color')
+    if color is not None and len(color):
+        primitive.color = tuple(color)
+    size = arrays.get('size')
+    if size is not None and not len(size):
+        size = None
+    positions = arrays.get('positions')
+    if isinstance(primitive, PointCloudPrim):
+        if size is not None:
+            primitive.size = max(int(size[0]), 1)
+        if positions is not None:
+            primitive.append(positions, arrays.get('colors'),
+                             arrays.get('sizes'))
+        return
+    # lines, drawn as linear curves (per point colors are not supported)
+    if size is not None:
+        primitive.width = size[0]
+    if positions is None:
+        return
+    points = _flatPoints(positions)
+    if append:
+        points = np.concatenate((primitive._prePoints, points)) \
+            if np is not None else list(primitive._prePoints) + points
+    primitive.points = points
+
+
+# === Glyph Primitive ===
+
+# Glyphs templates are line segments (pairs of points) in local space along
+# with the color of each segment (`None` meaning the glyph's `color`).
+_glyphTemplates = {
+    GLYPH_AXES: (
+        (((0.0, 0.0, 0.0), (1.0, 0.0, 0.0)), COLOR_RED),
+        (((0.0, 0.0, 0.0), (0.0, 1.0, 0.0)), COLOR_GREEN),
+        (((0.0, 0.0, 0.0), (0.0, 0.0, 1.0)), COLOR_BLUE),
+    ),
+    GLYPH_ARROW: (
+        (((0.0, 0.0, 0.0), (1.0, 0.0, 0.0)), None),
+        (((0.9, 0.1, 0.0), (1.0, 0.0, 0.0)), None),
+        (((0.9, -0.1, 0.0), (1.0, 0.0, 0.0)), None),
+    ),
+}
+
+
+class GlyphPrim(Primitive):
+    """
+    Primitive drawing the same shape (glyph) once per matrix, it's a cheap
+    alternative to lots of `TransformPrim`s or `VectorPrim`s as all instances
+    get updated and drawn at once.
+
+    Instances are placed by `matrices` (within the primitive's `transform`)
+    and can optionally have their own `colors` and `scales`, either one per
+    instance or a single one shared by all of them (any other length raises
+    `ValueError`).
+    """
+    def __init__(self, matrices=None, glyph=GLYPH_AXES, colors=None,
+                 scales=None, color=None, width=2):
+        super(GlyphPrim, self).__init__()
+        # `width` of the lines, in pixels
+        self.width = width
+        # `color` of templates without color (i.e. `GLYPH_ARROW`)
+        self.color = color or COLOR_BLACK
+        self._glyph = glyph
+        self._matrices = array.array('d')  # 16 floats per instance
+        self._colors = None
+        self._scales = None
+        self._buffer = VertexBuffer()
+        if matrices is not None:
+            self.matrices = matrices
+        self.colors = colors
+        self.scales = scales
+
+    def __len__(self):
+        return len(self._matrices) // 16
+
+    @property
+    def glyph(self):
+        return self._glyph
+
+    @glyph.setter
+    def glyph(self, value):
+        self._glyph = value
+        self.isDirty = True
+
+    # `matrices` holds one matrix per instance as a flat array, it can be
+    # set at once from a sequence of `MMatrix`/`MTransformationMatrix` (or
+    # anything with 16 floats) or a flat buffer of floats.
+    @property
+    def matrices(self):
+        return self._matrices
+
+    @matrices.setter
+    def matrices(self, value):
+        self._matrices = _matrixArray(value)
+        self.isDirty = True
+
+    def setMatrix(self, index, matrix):
+        self._matrices[index * 16:(index + 1) * 16] = _matrixArray((matrix,))
+        self.isDirty = True
+
+    # `colors` (one per instance) override the colors of the template.
+    @property
+    def colors(self):
+        return self._colors
+
+    @colors.setter
+    def colors(self, value):
+        if value is not None:
+            value = _packPoints(value)
+            _checkInstances(value, len(self), 'colors')
+        self._colors = value
+        self.isDirty = True
+
+    # `scales` (one float per instance) scale the template of each instance.
+    @property
+    def scales(self):
+        return self._scales
+
+    @scales.setter
+    def scales(self, value):
+        if value is not None:
+            value = array.array('d', value)
+            _checkInstances(value, len(self), 'scales')
+        self._scales = value
+        self.isDirty = True
+
+    def update(self):
+        super(GlyphPrim, self).update()
+        template = _glyphTemplates[self.glyph]
+        local = [p for segment, _ in template for p in segment]
+        count = len(self)
+
+        # (matrices might have changed after setting colors/scales)
+        scales = self._scales
+        if scales is not None:
+            scales = _checkInstances(scales, count, 'scales')
+        matrices = self._matrices
+        transform = tuple(self.worldMatrix)
+        if transform != _IDENTITY:
+            matrices = _multiplyMatrices(matrices, transform)
+        vertices = _instancePoints(local, matrices, scales)
+
+        if self._colors is not None:
+            colors = itertools.chain.from_iterable(
+                [c] * len(local) for c in _checkInstances(
+                    self._colors, count, 'colors'))
+        else:
+            colors = [c or self.color for _, c in template for _ in (0, 1)]
+            colors = colors * count
+        self._buffer.setArrays(vertices, array.array(
+            'd', itertools.chain.from_iterable(colors)))
+
+    def drawItems(self):
+        return [DrawItem(omr.MGL_LINES, self.width, None, self._buffer)]
+
+
+def _checkInstances(values, count, name, stride=1):
+    # Per instance `values` must be one per instance or a single one (which
+    # gets repeated), `stride` being the length of each value on flat
+    # arrays (i.e. 3 for flat RGB colors).
+    if len(values) == stride:
+        return values * count
+    if len(values) != count * stride:
+        raise ValueError('Expected 1 or {} {}, got {:g}'.format(
+            count, name, len(values) / float(stride)))
+    return values
+
+
+# == Rendering backend ==
+
+# Primitives pack their drawable points into a `VertexBuffer` when updated,
+# so drawing them is a single call (no matter how many points) handled by a
+# `Backend`. The backend is passed to primitives as the `renderer` argument
+# of `draw`, it also provides the `glFunctionTable` to set OpenGL state.
+
+class VertexBuffer(object):
+    """
+    Contiguous array of vertex positions (x, y, z, x, y, z...) and
+    optionally per-vertex colors (r, g, b, r, g, b...), per-vertex normals
+    and `indices` (drawing vertices by index, see `Backend.drawElements`).
+
+    `version` changes every time the data does (versions are unique across
+    buffers), letting backends know when their uploaded copy (stored in
+    `handle`) is outdated. Changes done through `updateVertices` are tracked
+    in `ranges`, so backends can upload just the modified vertices.
+
+    Buffers with `mergeable` set to `False` are never merged with others by
+    `SceneManager` (i.e. buffers updated partially).
+    """
+    _versions = itertools.count()
+
+    def __init__(self, points=None, colors=None):
+        self.vertices = array.array('d')
+        self.colors = None
+        self.normals = None
+        self.indices = None
+        self.count = 0
+        self.version = next(VertexBuffer._versions)
+        self.handle = None
+        self.handleVersion = -1
+        self.ranges = None  # (start, count) vertex ranges, None means all
+        self.mergeable = True
+        self._bounds = None
+        self._boundsVersion = -1
+        if points:
+            self.setPoints(points)
+        if colors:
+            self.setColors(colors)
+
+    # `bounds` of the vertices as a pair of (x, y, z) tuples (min, max),
+    # `None` if the buffer is empty. Cached until the data changes.
+    @property
+    def bounds(self):
+        if self._boundsVersion != self.version:
+            self._bounds = _bounds(self.vertices)
+            self._boundsVersion = self.version
+        return self._bounds
+
+    def setPoints(self, points):
+        self.setArrays(_floatArray(points), self.colors, self.indices,
+                       self.normals)
+
+    def setColors(self, colors):
+        if colors is None and self.colors is None:
+            return
+        self.setArrays(self.vertices,
+                       None if colors is None else _floatArray(colors),
+                       self.indices, self.normals)
+
+    def setArrays(self, vertices, colors=None, indices=None, normals=None):
+        """
+        Replaces the contents of the buffer by already packed arrays.
+        """
+        self.vertices = vertices
+        self.colors = colors
+        self.indices = indices
+        self.normals = normals
+        self.count = len(vertices) // 3
+        self.ranges = None
+        self.version = next(VertexBuffer._versions)
+
+    def updateVertices(self, start, values):
+        """
+        Overwrites vertex positions from `start` (vertex index) onwards by
+        `values` (flat floats or a sequence of points).
+        """
+        values = _floatArray(values)
+        self.vertices[start * 3:start * 3 + len(values)] = values
+        if self.ranges is not None:
+            self.ranges.append((start, len(values) // 3))
+        self.version = next(VertexBuffer._versions)
+
+
+class Backend(object):
+    """
+    Interface in between primitives and OpenGL, subclasses are expected to
+    implement `glFunctionTable` (state changes) and `drawArrays` (geometry).
+    """
+    def glFunctionTable(self):
+        raise NotImplementedError
+
+    def begin(self, view):
+        """
+        Starts drawing on `view`, the OpenGL state modified while drawing is
+        saved until `end`.
+        """
+        view.beginGL()
+        _pushAttrib(self.glFunctionTable())
+
+    def end(self, view):
+        self.glFunctionTable().glPopAttrib()
+        view.endGL()
+
+    def sync(self, buffer):
+        """
+        Uploads `buffer` if it changed since the last upload, either
+        entirely or just its modified `ranges`.
+        """
+        if buffer.handleVersion == buffer.version:
+            return
+        if buffer.ranges and buffer.handle is not None:
+            self.uploadRanges(buffer)
+        else:
+            self.upload(buffer)
+        buffer.ranges = list()
+        buffer.handleVersion = buffer.version
+
+    def upload(self, buffer):
+        """
+        Makes `buffer` drawable by the backend.
+        """
+        buffer.handle = None
+
+    def uploadRanges(self, buffer):
+        """
+        Updates the vertex `ranges` of an already uploaded `buffer`.
+        """
+        self.upload(buffer)
+
+    def drawArrays(self, mode, buffer):
+        """
+        Draws all vertices in `buffer` as a `mode` primitive (i.e.
+        `MGL_LINE_STRIP`), uploading it first if needed.
+        """
+        raise NotImplementedError
+
+    def drawElements(self, mode, buffer):
+        """
+        Same as `drawArrays`, but vertices are drawn according to the
+        `indices` of the buffer (shared vertices).
+        """
+        raise NotImplementedError
+
+
+class LegacyBackend(Backend):
+    """
+    Default backend using Maya's (legacy) `MGLFunctionTable`. Buffers are
+    uploaded as client side arrays.
+    """
+    def __init__(self, renderer=None):
+        super(LegacyBackend, self).__init__()
+        self.renderer = renderer or omr.MHardwareRenderer.theRenderer()
+
+    def glFunctionTable(self):
+        return self.renderer.glFunctionTable()
+
+    def upload(self, buffer):
+        super(LegacyBackend, self).upload(buffer)
+        buffer.handle = [
+            None if data is None else _scriptArray(data, typecode)
+            for data, typecode in ((buffer.vertices, 'd'),
+                                   (buffer.colors, 'd'),
+                                   (buffer.normals, 'd'),
+                                   (buffer.indices, 'I'))]
+
+    def uploadRanges(self, buffer):
+        _, pointer = buffer.handle[0]
+        vertices = _typedArray(buffer.vertices, 'd')
+        for start, count in buffer.ranges:
+            _copyInto(pointer, vertices, start * 3, count * 3)
+
+    def _bind(self, glFT, buffer):
+        # Enables the client arrays of `buffer`, returns the ones enabled.
+        self.sync(buffer)
+        vertices, colors, normals, _ = buffer.handle
+        enabled = [omr.MGL_VERTEX_ARRAY]
+        glFT.glEnableClientState(omr.MGL_VERTEX_ARRAY)
+        glFT.glVertexPointer(3, omr.MGL_DOUBLE, 0, vertices[1])
+        if colors is not None:
+            enabled.append(omr.MGL_COLOR_ARRAY)
+            glFT.glEnableClientState(omr.MGL_COLOR_ARRAY)
+            glFT.glColorPointer(3, omr.MGL_DOUBLE, 0, colors[1])
+        if normals is not None:
+            enabled.append(omr.MGL_NORMAL_ARRAY)
+            glFT.glEnableClientState(omr.MGL_NORMAL_ARRAY)
+            glFT.glNormalPointer(omr.MGL_DOUBLE, 0, normals[1])
+        return enabled
+
+    def drawArrays(self, mode, buffer):
+        if not buffer.count:
+            return
+        glFT = self.glFunctionTable()
+        enabled = self._bind(glFT, buffer)
+        glFT.glDrawArrays(mode, 0, buffer.count)
+        for each in enabled:
+            glFT.glDisableClientState(each)
+
+    def drawElements(self, mode, buffer):
+        if not buffer.count or buffer.indices is None or \
+                not len(buffer.indices):
+            return
+        glFT = self.glFunctionTable()
+        enabled = self._bind(glFT, buffer)
+        glFT.glDrawElements(mode, len(buffer.indices), omr.MGL_UNSIGNED_INT,
+                            buffer.handle[3][1])
+        for each in enabled:
+            glFT.glDisableClientState(each)
+
+
+def _scriptArray(values, typecode):
+    # Copies `values` into memory owned by a new `MScriptUtil` (client side
+    # arrays are read at draw time), returns (util, pointer). Indices are
+    # stored as unsigned ints ('I') and everything else as doubles ('d'),
+    # the storage is allocated once and filled by a single memory copy.
+    values = _typedArray(values, typecode)
+    util = om.MScriptUtil()
+    if typecode == 'I':
+        util.createFromList([0] * len(values), len(values))
+        pointer = util.asUintPtr()
+    else:
+        util.createFromList([0.0] * len(values), len(values))
+        pointer = util.asDoublePtr()
+    _copyInto(pointer, values, 0, len(values))
+    return util, pointer
+
+
+def _typedArray(values, typecode):
+    # Returns `values` as a contiguous array of `typecode` (as it is when
+    # it already is one).
+    if np is not None and isinstance(values, np.ndarray):
+        return np.ascontiguousarray(values, dtype=typecode)
+    if isinstance(values, array.array) and values.typecode == typecode:
+        return values
+    return array.array(typecode, values)
+
+
+def _copyInto(pointer, values, start, count):
+    # Copies `count` items of `values` from `start` onwards into the memory
+    # at `pointer` (same offset), `values` as returned by `_typedArray`.
+    address = values.buffer_info()[0] if isinstance(values, array.array) \
+        else values.ctypes.data
+    size = values.itemsize
+    ctypes.memmove(int(pointer) + start * size, address + start * size,
+                   count * size)
+
+
+class RecordingBackend(Backend):
+    """
+    Backend recording every call as a tuple in `commands` instead of
+    drawing, intended for testing/benchmarking without a viewport (it's the
+    default backend in headless mode).
+    """
+    def __init__(self):
+        super(RecordingBackend, self).__init__()
+        self.commands = list()
+        self._glFT = _GLRecorder(self.commands)
+
+    def glFunctionTable(self):
+        return self._glFT
+
+    def begin(self, view):
+        self.commands.append(('begin', ))
+        _pushAttrib(self._glFT)
+
+    def end(self, view):
+        self._glFT.glPopAttrib()
+        self.commands.append(('end', ))
+
+    def upload(self, buffer):
+        super(RecordingBackend, self).upload(buffer)
+        buffer.handle = buffer.count
+        self.commands.append(('upload', buffer.count))
+
+    def uploadRanges(self, buffer):
+        for start, count in buffer.ranges:
+            self.commands.append(('uploadRange', start, count))
+
+    def drawArrays(self, mode, buffer):
+        self.sync(buffer)
+        self.commands.append(('drawArrays', mode, buffer.count))
+
+    def drawElements(self, mode, buffer):
+        self.sync(buffer)
+        self.commands.append(('drawElements', mode, len(buffer.indices)))
+
+    def clear(self):
+        del self.commands[:]
+
+
+class _GLRecorder(object):
+    # Stand-in for `MGLFunctionTable` appending each call to `commands`.
+    def __init__(self, commands):
+        self._commands = commands
+
+    def __getattr__(self, name):
+        def record(*args):
+            self._commands.append((name,) + args)
+        return record
+
+
+class HeadlessView(object):
+    """
+    Stand-in for `M3dView` in headless mode, looking through `camera` (by
+    default a perspective `Camera` 100 units away from the origin, looking
+    down -Z).
+    """
+    def __init__(self, camera=None):
+        if camera is None:
+            matrix = list(_IDENTITY)
+            matrix[14] = 100.0
+            camera = Camera(matrix)
+        camera.view = self
+        self.camera = camera
+
+    def portWidth(self):
+        return self.camera.width
+
+    def portHeight(self):
+        return self.camera.height
+
+    def beginGL(self):
+        pass
+
+    def endGL(self):
+        pass
+
+    def refresh(self, *args):
+        pass
+
+
+# === Draw items ===
+
+# A `DrawItem` is the minimum unit of geometry sent to the backend: an OpenGL
+# `mode` (i.e. `MGL_POINTS`), a `size` (line width or point size), a uniform
+# `color` (`None` if colors are stored per vertex) and the vertex `buffer`.
+DrawItem = collections.namedtuple('DrawItem', 'mode size color buffer')
+
+
+def _pushAttrib(glFT):
+    # OpenGL state modified by `_drawItems`
+    glFT.glPushAttrib(omr.MGL_LINE_BIT | omr.MGL_POINT_BIT |
+                      omr.MGL_LIGHTING_BIT | omr.MGL_CURRENT_BIT)
+
+
+def _drawItems(backend, items):
+    # Draws `items` (ideally sorted) skipping redundant state changes.
+    # (point size and line width are separate pieces of OpenGL state)
+    glFT = backend.glFunctionTable()
+    pointSize = lineWidth = None
+    color = ()
+    for item in items:
+        if item.mode == omr.MGL_POINTS:
+            if item.size != pointSize:
+                pointSize = item.size
+                glFT.glPointSize(pointSize)
+        elif item.mode != omr.MGL_TRIANGLES and item.size != lineWidth:
+            lineWidth = item.size
+            glFT.glLineWidth(lineWidth)
+        if item.color != color:
+            color = item.color
+            if color is None:
+                glFT.glShadeModel(omr.MGL_SMOOTH)
+            else:
+                glFT.glColor3f(*color)
+        if item.buffer.indices is None:
+            backend.drawArrays(item.mode, item.buffer)
+        else:
+            backend.drawElements(item.mode, item.buffer)
+
+
+def _mergeItems(items):
+    # Merges compatible `items` (same mode, size and color) in a single
+    # item, strips are converted to separate segments (`MGL_LINES`) so they
+    # can be drawn at once. Indices get offset, and normals are kept only if
+    # all items have them.
+    mode = items[0].mode
+    buffers = [x.buffer for x in items]
+    vertices = array.array('d')
+    colors = array.array('d') if items[0].color is None else None
+    normals = indices = None
+    if mode == omr.MGL_LINE_STRIP:
+        for buffer in buffers:
+            _appendSegments(vertices, _ownArray(buffer.vertices))
+            if colors is not None:
+                _appendSegments(colors, _ownArray(buffer.colors))
+        mode = omr.MGL_LINES
+    else:
+        if all(x.normals is not None for x in buffers):
+            normals = array.array('d')
+        if any(x.indices is not None for x in buffers):
+            indices = array.array('I')
+        for buffer in buffers:
+            if indices is not None:
+                offset = len(vertices) // 3
+                if buffer.indices is None:
+                    indices.extend(array.array(
+                        'I', xrange(offset, offset + buffer.count)))
+                else:
+                    indices.extend(_offsetIndices(buffer.indices, offset))
+            vertices.extend(_ownArray(buffer.vertices))
+            if colors is not None:
+                colors.extend(_ownArray(buffer.colors))
+            if normals is not None:
+                normals.extend(_ownArray(buffer.normals))
+    merged = VertexBuffer()
+    merged.setArrays(vertices, colors, indices, normals)
+    return DrawItem(mode, items[0].size, items[0].color, merged)
+
+
+def _appendSegments(target, strip):
+    # Appends `strip` (flat x, y, z values) as separate segments (vertices
+    # 0 1 1 2 2 3...), interleaved by strided slice assignments rather than
+    # vertex by vertex.
+    count = len(strip) // 3
+    if count < 2:
+        return
+    segments = array.array(strip.typecode, (0,)) * (6 * (count - 1))
+    for i in xrange(3):
+        segments[i::6] = strip[i:-3:3]
+        segments[i + 3::6] = strip[i + 3::3]
+    target.extend(segments)
+
+
+def _offsetIndices(indices, offset):
+    # Returns `indices` + `offset` as array('I'), computed in bulk.
+    if np is not None:
+        values = np.frombuffer(indices, dtype='I') + np.uint32(offset)
+        return array.array('I', _arrayBytes(values.astype('I')))
+    return array.array('I', map(operator.add, indices,
+                                itertools.repeat(offset, len(indices))))
+
+
+def _stateOrder(key):
+    mode, size, color = key[:3]
+    return (mode, size, color or (), key[3:])
+
+
+_drawsItselfCache = dict()
+
+
+def _drawsItself(primitive):
+    # Primitives extending `draw` make their own OpenGL calls.
+    cls = type(primitive)
+    result = _drawsItselfCache.get(cls)
+    if result is None:
+        result = _drawsItselfCache[cls] = cls.draw != Primitive.draw
+    return result
+
+
+def _asBackend(renderer):
+    # Primitives can still be drawn with a plain `MHardwareRenderer`.
+    if isinstance(renderer, Backend):
+        return renderer
+    return LegacyBackend(renderer)
+
+
+# === Camera ===
+class Camera(object):
+    """
+    Snapshot of the camera looking through a viewport, used by primitives
+    that adapt themselves to the screen (i.e. `TESSELLATE_SCREEN` curves).
+
+    `key` identifies the state of the camera, so primitives can cache
+    results and only compute them again when the camera actually changes.
+    """
+    # Camera of the view being drawn, computed at most once per frame (see
+    # `current` and `invalidate`).
+    _current = None
+
+    def __init__(self, matrix=None, fov=math.radians(54.43), width=640,
+                 height=480, orthographic=False, orthoWidth=30.0,
+                 view=None):
+        self.view = view
+        self.matrix = om2.MMatrix() if matrix is None else om2.MMatrix(matrix)
+        self.fov = fov  # horizontal, radians
+        self.width = width
+        self.height = height
+        self.orthographic = orthographic
+        self.orthoWidth = orthoWidth
+
+        m = tuple(self.matrix)
+        self.position = (m[12], m[13], m[14])
+        self.direction = (-m[8], -m[9], -m[10])  # cameras look down -Z
+        self.key = (m, fov, width, height, orthographic, orthoWidth)
+
+        # Frustum (unit camera axes and half extents), used by `isVisible`.
+        self._axes = tuple(_normalize(x) for x in (
+            m[0:3], m[4:7], self.direction))
+        aspect = float(height) / max(width, 1)
+        if orthographic:
+            self._extents = (orthoWidth * 0.5, orthoWidth * 0.5 * aspect)
+        else:
+            self._extents = (math.tan(fov * 0.5),
+                             math.tan(fov * 0.5) * aspect)
+
+    @classmethod
+    def fromView(cls, view):
+        if isinstance(view, HeadlessView):
+            return view.camera
+        path = om.MDagPath()
+        view.getCamera(path)
+        sel = om2.MSelectionList()
+        sel.add(path.fullPathName())
+        dagPath = sel.getDagPath(0)
+        fn = om2.MFnCamera(dagPath)
+        return cls(dagPath.inclusiveMatrix(), fn.horizontalFieldOfView(),
+                   view.portWidth(), view.portHeight(), fn.isOrtho(),
+                   fn.orthoWidth, view)
+
+    @classmethod
+    def current(cls, view):
+        camera = cls._current
+        if camera is None or camera.view is not view:
+            camera = cls._current = cls.fromView(view)
+        return camera
+
+    @classmethod
+    def invalidate(cls):
+        cls._current = None
+
+    def pixelScale(self, point):
+        """
+        Number of pixels covered by one world unit at a given `point`
+        (0 if it is behind the camera).
+        """
+        if self.orthographic:
+            return self.width / self.orthoWidth
+        p, d = self.position, self.direction
+        depth = (point[0] - p[0]) * d[0] + (point[1] - p[1]) * d[1] + \
+            (point[2] - p[2]) * d[2]
+        if depth <= 1e-6:
+            return 0.0
+        return self.width / (2.0 * depth * math.tan(self.fov * 0.5))
+
+    def screenSize(self, bounds):
+        """
+        Approximated size in pixels of a bounding box (min, max) on screen.
+        """
+        (x0, y0, z0), (x1, y1, z1) = bounds
+        center = ((x0 + x1) * 0.5, (y0 + y1) * 0.5, (z0 + z1) * 0.5)
+        return _length(x1 - x0, y1 - y0, z1 - z0) * self.pixelScale(center)
+
+    def isVisible(self, bounds):
+        """
+        Whether a bounding box (min, max) might be seen by the camera, its
+        bounding sphere is tested against the view frustum (conservative).
+        """
+        (x0, y0, z0), (x1, y1, z1) = bounds
+        radius = 0.5 * _length(x1 - x0, y1 - y0, z1 - z0)
+        p = self.position
+        offset = ((x0 + x1) * 0.5 - p[0], (y0 + y1) * 0.5 - p[1],
+                  (z0 + z1) * 0.5 - p[2])
+        x, y, z = [offset[0] * a[0] + offset[1] * a[1] + offset[2] * a[2]
+                   for a in self._axes]
+        if self.orthographic:
+            return abs(x) <= self._extents[0] + radius and \
+                abs(y) <= self._extents[1] + radius
+        if z < -radius:
+            return False
+        for value, extent in ((x, self._extents[0]), (y, self._extents[1])):
+            # distance to the side planes of the frustum
+            if (abs(value) - z * extent) / math.sqrt(1.0 + extent * extent) \
+                    > radius:
+                return False
+        return True
+
+
+class LodPolicy(object):
+    """
+    Level of detail policy picking a level (see LOD constants) from the size
+    of a primitive on the screen: primitives smaller than `reduced` pixels
+    use their reduced variant, and smaller than `minimal` the minimal one.
+
+    A policy can be set for the whole scene (`SceneManager.lodPolicy`) or
+    per primitive (`Primitive.lodPolicy`).
+    """
+    def __init__(self, reduced=64.0, minimal=8.0):
+        self.reduced = reduced
+        self.minimal = minimal
+
+    def level(self, pixels):
+        if pixels < self.minimal:
+            return LOD_MINIMAL
+        if pixels < self.reduced:
+            return LOD_REDUCED
+        return LOD_FULL
+
+
+class _SpatialGrid(object):
+    """
+    Loose uniform grid indexing primitives by the center of their bounding
+    box, every cell keeps the union of its primitives' bounds so whole cells
+    get culled at once.
+    """
+    def __init__(self, cellSize=CULL_CELL_SIZE):
+        self.cellSize = cellSize
+        self._cells = dict()  # key: [bounds, {handle: (primitive, bounds)}]
+        self._keys = dict()  # handle: key
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, handle):
+        return handle in self._keys
+
+    def insert(self, handle, primitive, bounds):
+        key = tuple(int(math.floor((a + b) * 0.5 / self.cellSize))
+                    for a, b in zip(*bounds))
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = [bounds, dict()]
+        else:
+            cell[0] = _unionBounds(cell[0], bounds)
+        cell[1][handle] = (primitive, bounds)
+        self._keys[handle] = key
+
+    def remove(self, handle):
+        key = self._keys.pop(handle, None)
+        if key is None:
+            return False
+        members = self._cells[key][1]
+        del members[handle]
+        if not members:
+            del self._cells[key]
+        return True
+
+    def query(self, camera=None):
+        """
+        Yields the primitives that might be seen by `camera` (all of them if
+        `None`).
+        """
+        for bounds, members in self._cells.values():
+            if camera is not None and not camera.isVisible(bounds):
+                continue
+            for primitive, bounds in members.values():
+                if camera is None or camera.isVisible(bounds):
+                    yield primitive
+
+
+# === Profiling ===
+
+# Frames are profiled only when `SceneManager.profiler` is set, otherwise
+# `draw` doesn't even read the clock.
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class FrameStats(object):
+    """
+    Timings (in seconds) and counters of a frame drawn on a `panel`.
+
+    `phases` maps the stages of `SceneManager.draw` (`streams`,
+    `callbacks`, `prepare`, `collect`, `batch`, `submit` and `custom`) to
+    the time spent on them, `types` maps primitive types to the time spent
+    preparing and drawing them (custom primitives) and `callbacks` maps the
+    name of every registered callback to its running time.
+    """
+    def __init__(self, panel=None):
+        self.panel = panel
+        self.phases = collections.defaultdict(float)
+        self.types = collections.defaultdict(float)
+        self.callbacks = collections.defaultdict(float)
+        self.primitives = 0  # registered
+        self.drawn = 0  # visible primitives (not hidden nor culled)
+        self.dirty = 0  # prepared due to a change (or being live)
+        self.drawCalls = 0
+        self.vertices = 0
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self.summary())
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def summary(self):
+        """
+        Returns a one line description of the frame (see `showStats`).
+        """
+        return '{:.2f} ms, {} prims ({} drawn, {} dirty), {} calls, ' \
+            '{} verts'.format(self.total * 1000.0, self.primitives,
+                              self.drawn, self.dirty, self.drawCalls,
+                              self.vertices)
+
+    def asDict(self):
+        return dict(panel=self.panel, total=self.total,
+                    phases=dict(self.phases), types=dict(self.types),
+                    callbacks=dict(self.callbacks),
+                    primitives=self.primitives, drawn=self.drawn,
+                    dirty=self.dirty, drawCalls=self.drawCalls,
+                    vertices=self.vertices)
+
+
+class Profiler(object):
+    """
+    Keeps the `FrameStats` of the last `history` frames drawn by a
+    `SceneManager` (see `SceneManager.profiler`).
+    """
+    def __init__(self, history=120):
+        self.frames = collections.deque(maxlen=history)
+
+    def __len__(self):
+        return len(self.frames)
+
+    # `last` holds the stats of the latest drawn frame (`None` if none).
+    @property
+    def last(self):
+        return self.frames[-1] if self.frames else None
+
+    def begin(self, panel=None):
+        stats = FrameStats(panel)
+        self.frames.append(stats)
+        return stats
+
+    def clear(self):
+        self.frames.clear()
+
+    def average(self):
+        """
+        Returns a `FrameStats` averaging the recorded frames.
+        """
+        result = FrameStats()
+        count = float(len(self.frames) or 1)
+        for stats in self.frames:
+            for name in ('phases', 'types', 'callbacks'):
+                target = getattr(result, name)
+                for key, value in getattr(stats, name).items():
+                    target[key] += value / count
+        for name in ('primitives', 'drawn', 'dirty', 'drawCalls',
+                     'vertices'):
+            setattr(result, name, int(round(sum(
+                getattr(x, name) for x in self.frames) / count)))
+        return result
+
+
+def _callbackName(func):
+    return getattr(func, '__name__', None) or repr(func)
+
+
+# === Scene Manager ===
+class SceneManager(object):
+    """
+    `SceneManager` is the entity interacting with Maya renderer and managing
+    `mscreen` primitives, this is the main entry point for most users of the
+    library.
+    """
+    def __init__(self):
+        self._view = None
+        self._backend = None
+        # `mscreen` works by registering a callback in every model panel,
+        # said callbacks call to `draw` where all the registered primitives
+        # are proccessed (see `watchPanels`).
+        del self.callbacks
+        self._views = dict()
+        self._hiddenPanels = set()
+        # Primitives are prepared once per frame no matter how many panels
+        # get drawn, a new frame starts when a panel gets drawn again.
+        self._frame = 0
+        self._drawnPanels = set()
+        # Primitives are indexed by a stable integer handle, making
+        # registering/erasing a constant time operation. Handles are never
+        # reused.
+        self._primitives = collections.OrderedDict()
+        self._handles = itertools.count(1)
+        # `_layers` maps layer names to the set of handles living on them,
+        # primitives on a hidden layer are kept around but not drawn.
+        self._layers = dict()
+        self._hiddenLayers = set()
+        # `layer` is the layer new primitives are registered into when none
+        # is given explicitly (`None` means no layer at all).
+        self.layer = None
+        # `_dirty` holds the handles of the primitives to prepare on the next
+        # draw, primitives not dirty (nor live) just get their draw items
+        # collected.
+        self._dirty = set()
+        self._refreshPending = False
+        # `_watched` holds the handles of the primitives whose `transform`
+        # is checked for in place changes on every frame.
+        self._watched = set()
+        # Primitives that didn't change on the last draw are moved from
+        # `_dynamic` into the `_static` grid, culled cell by cell. Culling
+        # can be disabled by setting `culling` to `False`.
+        self._dynamic = collections.OrderedDict()
+        self._static = _SpatialGrid()
+        self.culling = True
+        # `lodPolicy` is the default `LodPolicy` of primitives (`None`
+        # draws everything at full detail).
+        self.lodPolicy = None
+        self._callbacks = list()
+        self._batches = dict()  # merged items per panel
+        # `profiler` collects per frame `FrameStats` when set to a
+        # `Profiler` (see `enableProfiler`), it's disabled by default.
+        self.profiler = None
+        # Streams feeding primitives (`StreamReceiver`s) and the servers
+        # accepting them, see `stream` and `listen`.
+        self._streams = list()
+        self._servers = list()
+        self._streamRefresh = False
+        self.watchPanels()
+
+    # `view` is the active Maya 3d view (used to refresh the viewport),
+    # resolved on first use.
+    @property
+    def view(self):
+        if self._view is None:
+            self._view = HeadlessView() if _noViewport() else \
+                omui.M3dView.active3dView()
+        return self._view
+
+    @view.setter
+    def view(self, value):
+        self._view = value
+
+    # `backend` is in charge of the actual OpenGL calls, it can be swapped
+    # by any other implementation of `Backend` (i.e. `RecordingBackend`).
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = RecordingBackend() if _noViewport() else \
+                LegacyBackend()
+        return self._backend
+
+    @backend.setter
+    def backend(self, value):
+        self._backend = value
+
+    # Maya's callbacks (panel name: callback ids) are stored as a singleton
+    # in the maya module so they can be managed after reloading this module
+    # avoiding memory leaks.
+    @property
+    def callbacks(self):
+        if HEADLESS:
+            return dict()
+        if not hasattr(maya, "mscreen_callbacks"):
+            maya.mscreen_callbacks = dict()
+        return maya.mscreen_callbacks
+
+    @callbacks.deleter
+    def callbacks(self):
+        if not HEADLESS:
+            _releaseCallbacks()
+
+    def watchPanels(self):
+        """
+        Registers the drawing callbacks on model panels not being watched yet
+        (i.e. new or torn off panels), it's called on every refresh.
+        """
+        if _noViewport():
+            return
+        callbacks = self.callbacks
+        for panel in mc.getPanel(type="modelPanel") or ():
+            if panel in callbacks:
+                continue
+            callbacks[panel] = (
+                omui.MUiMessage.add3dViewPostRenderMsgCallback(
+                    panel, self._drawCallback(panel)),
+                omui.MUiMessage.addUiDeletedCallback(
+                    panel, self._deletedCallback(panel)))
+
+    def _drawCallback(self, panel):
+        return lambda *args: self.draw(panel)
+
+    def _deletedCallback(self, panel):
+        def callback(*args):
+            self.callbacks.pop(panel, None)
+            self._views.pop(panel, None)
+            self._batches.pop(panel, None)
+        return callback
+
+    def _panelView(self, panel):
+        view = self._views.get(panel)
+        if view is None:
+            view = self._views[panel] = omui.M3dView()
+            omui.M3dView.getM3dViewFromModelPanel(panel, view)
+        return view
+
+    def setPanelVisible(self, panel, visible=True):
+        """
+        Shows/hides all primitives on a given model `panel`.
+        """
+        if visible:
+            self._hiddenPanels.discard(panel)
+        else:
+            self._hiddenPanels.add(panel)
+
+    def isPanelVisible(self, panel):
+        return panel not in self._hiddenPanels
+
+    def draw(self, panel=None):
+        """
+        Draws the registered primitives on a model `panel` (the active view
+        if `None`). It's called by Maya after rendering every panel, but it
+        can be called by hand as well (i.e. headless mode).
+        """
+        if panel in self._hiddenPanels:
+            return
+        view = self.view if panel is None else self._panelView(panel)
+        if panel in self._drawnPanels:
+            self._drawnPanels.clear()
+            self._frame += 1
+        newFrame = not self._drawnPanels
+        self._drawnPanels.add(panel)
+        frame = self._frame
+        stats = None if self.profiler is None else \
+            self.profiler.begin(panel)
+
+        Camera.invalidate()
+        camera = Camera.current(view) if self.culling else None
+        # apply streamed data and run callbacks (once per frame)
+        if newFrame and self._streams:
+            start = None if stats is None else _clock()
+            self._applyStreams()
+            if stats is not None:
+                stats.phases['streams'] = _clock() - start
+        if newFrame:
+            for each in self._callbacks:
+                if stats is None:
+                    each()
+                    continue
+                start = _clock()
+                each()
+                elapsed = _clock() - start
+                stats.callbacks[_callbackName(each)] += elapsed
+                stats.phases['callbacks'] += elapsed
+            for handle in self._watched:
+                self._primitives[handle]._checkTransform()
+        if stats is not None:
+            stats.primitives = len(self._primitives)
+            start = _clock()
+
+        # Primitives are prepared first and their draw items grouped by
+        # OpenGL state (mode, size and color), every group gets merged and
+        # drawn with a single call. Primitives drawing themselves (see
+        # `Primitive.drawItems`) are drawn last.
+        groups = dict()
+        custom = list()
+        settled = list()
+        dirty = self._dirty
+        hidden = self._hiddenLayers
+        dynamic = self._dynamic
+        for handle in dirty:
+            if self._static.remove(handle):
+                dynamic[handle] = self._primitives[handle]
+
+        for each in itertools.chain(list(dynamic.values()),
+                                    self._static.query(camera)):
+            if hidden and each._layer in hidden:
+                continue
+            if each.panels is not None and panel not in each.panels:
+                continue
+            if _drawsItself(each):
+                custom.append(each)
+                continue
+            # (geometry is shared by all panels, it's updated just once)
+            if (each.isLive and each._frame != frame) or \
+                    each._handle in dirty:
+                if stats is None:
+                    each.prepare(view)
+                else:
+                    prepareStart = _clock()
+                    each.prepare(view)
+                    elapsed = _clock() - prepareStart
+                    stats.types[type(each).__name__] += elapsed
+                    stats.phases['prepare'] += elapsed
+                    stats.dirty += 1
+                each._frame = frame
+                dirty.discard(each._handle)
+            items = each.drawItems() or ()
+            bounds = each._itemsBounds(items)
+            if bounds is None:
+                continue
+            if each._handle in dynamic:
+                # (static primitives are already culled by the grid)
+                if not each.isLive and each._handle not in dirty:
+                    settled.append((each, bounds))
+                if camera is not None and not camera.isVisible(bounds):
+                    continue
+            policy = each.lodPolicy or self.lodPolicy
+            if policy is not None:
+                size = Camera.current(view).screenSize(bounds)
+                level = policy.level(size)
+                if level != LOD_FULL:
+                    items = each.lodItems(level) or ()
+            for item in items:
+                key = item[:3] if item.buffer.mergeable else \
+                    item[:3] + (id(item.buffer),)
+                groups.setdefault(key, list()).append(item)
+            if stats is not None:
+                stats.drawn += 1
+        if stats is not None:
+            stats.phases['collect'] = \
+                _clock() - start - stats.phases['prepare']
+            start = _clock()
+
+        batches = dict()
+        if groups:
+            cache = self._batches.get(panel, dict())
+            items = list()
+            for key in sorted(groups, key=_stateOrder):
+                items.append(self._batch(key, groups[key], cache, batches))
+            if stats is not None:
+                stats.phases['batch'] = _clock() - start
+                stats.drawCalls = len(items)
+                stats.vertices = sum(x.buffer.count for x in items)
+                start = _clock()
+
+            self.backend.begin(view)
+            _drawItems(self.backend, items)
+            self.backend.end(view)
+            if stats is not None:
+                stats.phases['submit'] = _clock() - start
+        self._batches[panel] = batches
+
+        for each, bounds in settled:
+            del dynamic[each._handle]
+            self._static.insert(each._handle, each, bounds)
+
+        for each in custom:
+            if stats is None:
+                each.draw(view, self.backend)
+                continue
+            start = _clock()
+            each.draw(view, self.backend)
+            elapsed = _clock() - start
+            stats.types[type(each).__name__] += elapsed
+            stats.phases['custom'] += elapsed
+            stats.drawn += 1
+
+    def _batch(self, key, items, cache, batches):
+        # Merged items are cached until any of their buffers change.
+        if len(items) == 1:
+            return items[0]
+        signature = [x.buffer.version for x in items]
+        cached = cache.get(key)
+        if cached is None or cached[0] != signature:
+            cached = (signature, _mergeItems(items))
+        batches[key] = cached
+        return cached[1]
+
+    def refresh(self, immediate=False):
+        """
+        Requests a refresh of the Maya viewport. Requests are coalesced into
+        a single refresh deferred to the next idle tick, unless `immediate`.
+        """
+        if _noViewport():
+            self.draw()  # nothing to refresh, draw right away
+            return
+        if immediate:
+            self._refreshPending = False
+            self.watchPanels()
+            self.view.refresh(True, True)
+            return
+        if self._refreshPending:
+            return
+        self._refreshPending = True
+        maya.utils.executeDeferred(self._deferredRefresh)
+
+    def _deferredRefresh(self):
+        if self._refreshPending:
+            self.refresh(immediate=True)
+
+    def enableProfiler(self, history=120):
+        """
+        Starts collecting `FrameStats` of the last `history` drawn frames,
+        returns the `Profiler`.
+        """
+        self.profiler = Profiler(history)
+        return self.profiler
+
+    def disableProfiler(self):
+        self.showStats(False)
+        self.profiler = None
+
+    # `stats` of the last drawn frame (`None` if the profiler is disabled).
+    @property
+    def stats(self):
+        return None if self.profiler is None else self.profiler.last
+
+    def showStats(self, visible=True):
+        """
+        Shows the stats of the last drawn frame on a heads up display
+        (enabling the profiler if needed).
+        """
+        if visible and self.profiler is None:
+            self.enableProfiler()
+        if _noViewport():
+            return
+        if getattr(maya, "mscreen_hud", False) and \
+                mc.headsUpDisplay(STATS_HUD, exists=True):
+            mc.headsUpDisplay(STATS_HUD, remove=True)
+        maya.mscreen_hud = visible
+        if not visible:
+            return
+        mc.headsUpDisplay(STATS_HUD, section=STATS_HUD_SECTION,
+                          block=mc.headsUpDisplay(
+                              nextFreeBlock=STATS_HUD_SECTION),
+                          label='mscreen', labelFontSize='small',
+                          command=self._statsSummary,
+                          attachToRefresh=True)
+
+    def _statsSummary(self):
+        stats = self.stats
+        return '' if stats is None else stats.summary()
+
+    def clear(self):
+        """
+        Clear the screen by removing all registered primitives.
+        """
+        for each in self._primitives.values():
+            each._handle = each._scene = None
+        self._primitives = collections.OrderedDict()
+        self._layers = dict()
+        self._dirty = set()
+        self._watched = set()
+        self._dynamic = collections.OrderedDict()
+        self._static = _SpatialGrid()
+        self._batches = dict()
+
+    def save(self, path, primitives=None):
+        """
+        Saves the registered primitives (or the given `primitives`) to a
+        scene file (see `Scene files`), returns the number of primitives
+        saved.
+        """
+        if primitives is None:
+            primitives = list(self._primitives.values())
+        for each in primitives:
+            # (primitives never drawn have no draw items yet)
+            if each._scene is not self:
+                each.prepare(self.view)
+            elif each._handle in self._dirty:
+                each.prepare(self.view)
+                self._dirty.discard(each._handle)
+        return _saveScene(path, primitives)
+
+    def load(self, path, layer=None):
+        """
+        Registers the primitives stored on a scene file, on the layer they
+        were saved from (unless a `layer` is given). Returns the loaded
+        primitives.
+        """
+        result = list()
+        for primitive, original in _loadScene(path):
+            self.registerPrimitive(primitive, layer or original)
+            result.append(primitive)
+        return result
+
+    def stream(self, source, layer=None):
+        """
+        Starts reading a stream of primitives (see `Streaming`) from
+        `source`: a connected socket, a file object, a file descriptor or
+        the path of a named pipe. Returns the `StreamReceiver`.
+        """
+        receiver = StreamReceiver(self, source, layer)
+        self._streams.append(receiver)
+        return receiver.start()
+
+    def listen(self, address=('127.0.0.1', 0), layer=None):
+        """
+        Accepts stream connections on `address` (see `StreamServer`),
+        returns the server.
+        """
+        server = StreamServer(self, address, layer)
+        self._servers.append(server)
+        return server.start()
+
+    def stopStreams(self):
+        for each in self._servers + self._streams:
+            each.stop()
+        self._servers = list()
+
+    def _applyStreams(self):
+        for each in list(self._streams):
+            each.apply()
+            if not each.isAlive and not each.pending:
+                self._streams.remove(each)
+
+    def _requestStreamRefresh(self):
+        # Called from the stream threads, refreshing gets deferred to Maya's
+        # main thread (once per batch of messages).
+        if self._streamRefresh or _noViewport():
+            return
+        self._streamRefresh = True
+        maya.utils.executeDeferred(self._streamRefreshed)
+
+    def _streamRefreshed(self):
+        self._streamRefresh = False
+        self.refresh()
+
+    def registerCallback(self, func):
+        """
+        Unless previous callbacks, this register a function at a mscreen level
+        that you can use to update all primitives according to some event.
+
+        An example of this callback is the particle system on
+        `tests/tests_stress.py`, where we register a callback simulating all
+        primitives/particles on time chance.
+        """
+        self._callbacks.append(func)
+
+    def unregisterCallback(self, item):
+        if isinstance(item, int):
+            item = self._callbacks[item]
+        if item in self._callbacks:
+            self._callbacks.remove(item)
+
+    # === Primitive registry ===
+
+    # `primitives` returns a list of the registered primitives in drawing
+    # order, it's a copy so modifying it doesn't affect the scene.
+    @property
+    def primitives(self):
+        return list(self._primitives.values())
+
+    def registerPrimitive(self, primitive, layer=None):
+        """
+        Registers `primitive` to be drawn and returns its handle, a stable
+        integer that can be used to query or erase the primitive later on.
+        The primitive is added to `layer` (defaults to the scene's current
+        `layer`).
+
+        Primitives belong to a single scene at a time, a primitive registered
+        on another scene gets unregistered from it first (handles are only
+        meaningful within their scene).
+        """
+        if primitive._scene is self:
+            return primitive._handle
+        if primitive._scene is not None:
+            primitive._scene.unregisterPrimitive(primitive)
+        handle = next(self._handles)
+        primitive._handle = handle
+        primitive._scene = self
+        self._primitives[handle] = primitive
+        self._dynamic[handle] = primitive
+        self._dirty.add(handle)
+        if primitive._watchedMatrix is not None:
+            self._watched.add(handle)
+        primitive._layer = self.layer if layer is None else layer
+        if primitive._layer is not None:
+            self._layers.setdefault(primitive._layer, set()).add(handle)
+        return handle
+
+    def unregisterPrimitive(self, item):
+        """
+        Erases a primitive given the primitive itself or its handle. An
+        iterable of primitives/handles can be passed to erase many of them in
+        one call. Returns the number of primitives erased.
+        """
+        if isinstance(item, (Primitive, int)):
+            item = (item, )
+        count = 0
+        for each in item:
+            if isinstance(each, int):
+                handle = each
+            elif each._scene is self:
+                handle = each._handle
+            else:  # not registered here
+                continue
+            primitive = self._primitives.pop(handle, None)
+            if primitive is None:
+                continue
+            handles = self._layers.get(primitive._layer)
+            if handles is not None:
+                handles.discard(handle)
+            self._dirty.discard(handle)
+            self._watched.discard(handle)
+            self._dynamic.pop(handle, None)
+            self._static.remove(handle)
+            primitive._handle = primitive._scene = None
+            count += 1
+        return count
+
+    def getPrimitive(self, handle):
+        """
+        Returns the primitive registered with `handle` (`None` if missing).
+        """
+        return self._primitives.get(handle)
+
+    # === Layers ===
+
+    # Layers are named groups of primitives that can be erased or hidden as a
+    # whole. Primitives get into a layer at registration time (see
+    # `registerPrimitive` and `layer`) or through `setPrimitiveLayer`.
+    def layers(self):
+        return sorted(self._layers)
+
+    def layerPrimitives(self, layer):
+        return [self._primitives[x] for x in self._layers.get(layer, ())]
+
+    def setPrimitiveLayer(self, primitive, layer):
+        """
+        Moves a registered `primitive` (or handle) to `layer`, `None` removes
+        it from any layer. Primitives registered on another scene are left
+        untouched.
+        """
+        if isinstance(primitive, int):
+            primitive = self._primitives[primitive]
+        if primitive._scene is not self:
+            return
+        handles = self._layers.get(primitive._layer)
+        if handles is not None:
+            handles.discard(primitive._handle)
+        primitive._layer = layer
+        if layer is not None:
+            self._layers.setdefault(layer, set()).add(primitive._handle)
+
+    def eraseLayer(self, layer):
+        """
+        Erases all the primitives on `layer`, returns how many were erased.
+        """
+        handles = self._layers.pop(layer, ())
+        self._hiddenLayers.discard(layer)
+        return self.unregisterPrimitive(list(handles))
+
+    def setLayerVisible(self, layer, visible=True):
+        if visible:
+            self._hiddenLayers.discard(layer)
+        else:
+            self._hiddenLayers.add(layer)
+
+    def isLayerVisible(self, layer):
+        return layer not in self._hiddenLayers
+
+    def drawCurve(self, points, degree=None, color=None, width=2):
+        """
+        Convenience method creating and registering a `CurvePrim`.
+        """
+        curve = CurvePrim(points, degree, color, width)
+        self.registerPrimitive(curve)
+        return curve
+
+    def drawTransform(self, transform=None):
+        """
+        Convenience method creating and registering a `TransformPrim`.
+        """
+        xfo = TransformPrim(transform)
+        self.registerPrimitive(xfo)
+        return xfo
+
+    def drawPoint(self, position=None, color=None, size=2):
+        """
+        Convenience method creating and registering a `PointPrim`.
+        """
+        point = PointPrim(position, color, size)
+        self.registerPrimitive(point)
+        return point
+
+    def drawPoints(self, positions=None, colors=None, sizes=None, color=None,
+                   size=2):
+        """
+        Convenience method creating and registering a `PointCloudPrim`.
+        """
+        cloud = PointCloudPrim(positions, colors, sizes, color, size)
+        self.registerPrimitive(cloud)
+        return cloud
+
+    def drawParticles(self, color=None, size=2, startFrame=1):
+        """
+        Convenience method creating and registering a `ParticlePrim`.
+        """
+        particles = ParticlePrim(color, size, startFrame)
+        self.registerPrimitive(particles)
+        return particles
+
+    def drawGlyphs(self, matrices, glyph=GLYPH_AXES, colors=None,
+                   scales=None):
+        """
+        Convenience method creating and registering a `GlyphPrim`.
+        """
+        glyphs = GlyphPrim(matrices, glyph, colors, scales)
+        self.registerPrimitive(glyphs)
+        return glyphs
+
+    def drawMesh(self, vertices, indices, colors=None, normals=None,
+                 color=None):
+        """
+        Convenience method creating and registering a `MeshPrim`.
+        """
+        mesh = MeshPrim(vertices, indices, colors, normals, color)
+        self.registerPrimitive(mesh)
+        return mesh
+
+    def drawMeshMirror(self, mesh, colors=None, color=None):
+        """
+        Convenience method creating and registering a `MeshMirrorPrim`.
+        """
+        mirror = MeshMirrorPrim(mesh, colors, color)
+        self.registerPrimitive(mirror)
+        return mirror
+
+    def drawTriangle(self, points, colors):
+        triangle = TrianglePrim(points, colors)
+        self.registerPrimitive(triangle)
+        return triangle
+
+    @staticmethod
+    def getCurrentModelPanel():
+        currentModelPanel = mc.getPanel(wf=True)
+        if "modelPanel" not in currentModelPanel:
+            currentModelPanel = mc.getPanel(vis=True)
+            for each in currentModelPanel:
+                if "modelPanel" in each:
+                    currentModelPanel = each
+        return currentModelPanel
 
 
 # === Utility functions ===
@@ -697,32 +4046,953 @@ def linearInterpolate(t, p0, p1):
 
 def bezierInterpolate(t, points):
     """
-    Performs a bezier interpolation (recursive).
+    Performs a bezier interpolation at a given `t`.
     """
     if not _isIterable(points):
         logger.error('Points is expected to be a secuence of points')
         return
+    points = _packPoints(points)
     n = len(points) - 1
-    n_factorial = math.factorial(n)
-    for i, p in enumerate(points):
-        if not isinstance(p, om2.MVector):
-            p = om2.MVector(p)
-        k = n_factorial / float(math.factorial(i) * math.factorial(n - i))
-        b = (t**i) * (1 - t)**(n - i)
-        v = p * b * k
-        if i == 0:
-            rval = v
+    if n > BEZIER_MAX_BASIS_DEGREE:
+        return om2.MVector(deCasteljau(t, points))
+    u = 1.0 - t
+    x = y = z = 0.0
+    for i, k in enumerate(_binomials(n)):
+        b = k * (t**i) * u**(n - i)
+        p = points[i]
+        x += p[0] * b
+        y += p[1] * b
+        z += p[2] * b
+    return om2.MVector(x, y, z)
+
+
+# === Bezier engine ===
+
+# Tessellating a bezier curve means evaluating the same polynomials over and
+# over, the only thing changing between curves (or between frames of the same
+# curve) are the control points. The Bernstein basis depends exclusively on
+# the degree and the number of samples, so it gets computed once and cached,
+# leaving a single matrix product (samples x cvs) * (cvs x 3) per update.
+_binomialsCache = dict()
+_bernsteinCache = dict()
+
+
+def _binomials(n):
+    coeffs = _binomialsCache.get(n)
+    if coeffs is None:
+        coeffs = [1.0]
+        for i in xrange(n):
+            coeffs.append(coeffs[-1] * (n - i) / (i + 1))
+        coeffs = tuple(coeffs)
+        _binomialsCache[n] = coeffs
+    return coeffs
+
+
+def _toXYZ(point):
+    if len(point) > 2:
+        return (float(point[0]), float(point[1]), float(point[2]))
+    return (float(point[0]), float(point[1]), 0.0)
+
+
+def _packPoints(points):
+    return [_toXYZ(p) for p in points]
+
+
+def bernsteinBasis(degree, samples):
+    """
+    Returns the Bernstein basis matrix (`samples` rows by `degree + 1`
+    columns) evaluated at `samples` evenly spaced parameters in [0, 1].
+
+    Results are cached, so callers are not expected to modify them.
+    """
+    key = (degree, samples)
+    basis = _bernsteinCache.get(key)
+    if basis is not None:
+        return basis
+
+    coeffs = _binomials(degree)
+    rows = list()
+    for s in xrange(samples):
+        t = s / float(samples - 1) if samples > 1 else 0.0
+        u = 1.0 - t
+        rows.append(tuple(k * (t**i) * u**(degree - i)
+                          for i, k in enumerate(coeffs)))
+    basis = np.array(rows, dtype=float) if np is not None else tuple(rows)
+    _bernsteinCache[key] = basis
+    return basis
+
+
+def deCasteljau(t, points):
+    """
+    Evaluates a bezier curve at `t` using de Casteljau's algorithm.
+
+    `points` are expected to be packed as (x, y, z) tuples, the result is
+    returned packed in the same way.
+    """
+    u = 1.0 - t
+    pts = list(points)
+    for n in xrange(len(pts) - 1, 0, -1):
+        for i in xrange(n):
+            a = pts[i]
+            b = pts[i + 1]
+            pts[i] = (a[0] * u + b[0] * t,
+                      a[1] * u + b[1] * t,
+                      a[2] * u + b[2] * t)
+    return pts[0]
+
+
+def bezierCurve(points, samples):
+    """
+    Tessellates the bezier curve defined by `points` into `samples` evenly
+    spaced (in parameter space) points.
+
+    All samples are evaluated at once from the cached Bernstein basis, points
+    are returned as (x, y, z) tuples.
+    """
+    return _pointList(_bezierSamples(_packPoints(points), samples))
+
+
+def _bezierSamples(points, samples):
+    # Same as `bezierCurve` but taking/returning packed points (a NumPy array
+    # if available).
+    if not len(points) or samples < 1:
+        return _pointArray(())
+    degree = len(points) - 1
+
+    if degree > BEZIER_MAX_BASIS_DEGREE:
+        points = _pointList(points)
+        step = 1.0 / (samples - 1) if samples > 1 else 0.0
+        return _pointArray([deCasteljau(i * step, points)
+                            for i in xrange(samples)])
+
+    return _evaluateBasis(bernsteinBasis(degree, samples), points)
+
+
+def _evaluateBasis(basis, points):
+    # (samples x cvs) * (cvs x 3), `points` packed as (x, y, z) tuples
+    if np is not None:
+        return basis.dot(np.asarray(points, dtype=float))
+
+    xs, ys, zs = zip(*points)
+    mul = operator.mul
+    return [(sum(map(mul, row, xs)), sum(map(mul, row, ys)),
+             sum(map(mul, row, zs))) for row in basis]
+
+
+_IDENTITY = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0,
+             0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+
+def _pointArray(points):
+    # Packs `points` as a (N, 3) NumPy array if available, a list of (x, y, z)
+    # tuples otherwise.
+    if np is None:
+        return _packPoints(points)
+    if isinstance(points, np.ndarray):
+        points = points.astype(float).reshape(len(points), -1)
+        if points.shape[1] == 3:
+            return points
+        result = np.zeros((len(points), 3))
+        result[:, :min(points.shape[1], 3)] = points[:, :3]
+        return result
+    return np.array(_packPoints(points), dtype=float).reshape(-1, 3)
+
+
+def _flatPoints(values):
+    # Packs flat floats (x, y, z, x, y, z...) the same way as `_pointArray`.
+    if np is not None:
+        return np.asarray(values, dtype=float).reshape(-1, 3)
+    it = iter(values)
+    return list(zip(it, it, it))
+
+
+def _pointList(points):
+    # Inverse of `_pointArray`, returns a list of (x, y, z) tuples.
+    if np is not None and isinstance(points, np.ndarray):
+        return [tuple(p) for p in points.tolist()]
+    return list(points)
+
+
+def _changedPoints(points, other):
+    # Indices of the points differing in between two packed sequences.
+    if np is not None:
+        return np.nonzero((points != other).any(axis=1))[0].tolist()
+    return [i for i, (a, b) in enumerate(zip(points, other)) if a != b]
+
+
+def _toArray(values):
+    # Converts a NumPy array to a flat array('d') without going through
+    # Python objects.
+    return array.array('d', np.ascontiguousarray(values, dtype=float)
+                       .tobytes())
+
+
+def _floatArray(values):
+    # Packs `values` (flat floats or a sequence of points) as array('d').
+    if isinstance(values, array.array):
+        return array.array('d', values)
+    if np is not None and isinstance(values, np.ndarray):
+        return _toArray(values)
+    values = values if isinstance(values, (list, tuple)) else list(values)
+    if values and _isIterable(values[0]):
+        return array.array('d', itertools.chain.from_iterable(
+            (p[0], p[1], p[2]) for p in values))
+    return array.array('d', values)
+
+
+def _typecode(values):
+    # Typecode of an array, either an `array.array` or a NumPy view of a
+    # loaded file (see `Scene files`).
+    return getattr(values, 'typecode', None) or values.dtype.char
+
+
+def _arrayCopy(values):
+    # Copies an array (or a NumPy view) into a new `array.array`.
+    if isinstance(values, array.array):
+        return values[:]
+    return array.array(values.dtype.char, _arrayBytes(values))
+
+
+def _ownArray(values):
+    # Arrays loaded from files are read only views, they get copied before
+    # being modified in place.
+    return values if isinstance(values, array.array) else _arrayCopy(values)
+
+
+def _distinct(values):
+    # Sorted distinct values of an array.
+    if np is not None and len(values):
+        values = np.frombuffer(values, dtype=_typecode(values))
+        if (values == values[0]).all():
+            return [values[0].item()]
+        return np.unique(values).tolist()
+    return sorted(set(values))
+
+
+def _gatherArray(values, indices, stride):
+    # Picks the `indices` elements (of `stride` length) from `values`.
+    typecode = _typecode(values)
+    if np is not None and len(values):
+        picked = np.frombuffer(values, dtype=typecode).reshape(
+            -1, stride)[np.asarray(indices, dtype=int)]
+        return array.array(typecode, picked.tobytes())
+    if stride == 1:
+        return array.array(typecode, [values[i] for i in indices])
+    return array.array(typecode, itertools.chain.from_iterable(
+        values[i * stride:(i + 1) * stride] for i in indices))
+
+
+def _unmasked(mask, count):
+    # Indices of the first `count` elements whose `mask` value is not set
+    # (elements past the end of `mask` are kept), `None` if none is masked.
+    if np is not None:
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            return None
+        return np.concatenate((np.nonzero(~mask)[0],
+                               np.arange(len(mask), count)))
+    keep = [i for i, x in enumerate(mask) if not x]
+    if len(keep) == len(mask):
+        return None
+    keep.extend(xrange(len(mask), count))
+    return keep
+
+
+def _groupIndices(values):
+    # Groups the indices of `values` (array) by value, returns a list of
+    # sorted (value, indices) pairs.
+    if np is not None and len(values):
+        values = np.frombuffer(values, dtype=_typecode(values))
+        order = np.argsort(values, kind='mergesort')
+        keys, starts = np.unique(values[order], return_index=True)
+        return list(zip(keys.tolist(), np.split(order, starts[1:])))
+    indices = dict()
+    for i, value in enumerate(values):
+        indices.setdefault(value, list()).append(i)
+    return sorted(indices.items())
+
+
+def _transformArray(values, matrix):
+    # Same as `_transformPoints` but from/to flat arrays.
+    m = tuple(matrix)
+    if m == _IDENTITY:
+        return values
+    if np is not None:
+        m = np.array(m).reshape(4, 4)
+        pts = np.frombuffer(values, dtype=float).reshape(-1, 3)
+        return _toArray(pts.dot(m[:3, :3]) + m[3, :3])
+    it = iter(values)
+    return array.array('d', itertools.chain.from_iterable(
+        _transformPoints(zip(it, it, it), m)))
+
+
+def _ranges(indices, gap=0):
+    # Groups sorted `indices` in (start, end) ranges, indices closer than
+    # `gap` end up in the same range.
+    result = list()
+    for i in indices:
+        if result and i - result[-1][1] <= gap:
+            result[-1][1] = i + 1
+        else:
+            result.append([i, i + 1])
+    return [tuple(x) for x in result]
+
+
+def _indexArray(indices):
+    # Packs `indices` (flat or a sequence of triangles) as array('I').
+    if np is not None and isinstance(indices, np.ndarray):
+        return array.array('I', indices.ravel().tolist())
+    indices = list(indices)
+    if indices and _isIterable(indices[0]):
+        indices = itertools.chain.from_iterable(indices)
+    return array.array('I', indices)
+
+
+def _transformNormals(normals, matrix):
+    # Rotates/scales packed `normals` by `matrix` (normalizing them again),
+    # non-uniform scaling is not taken into account.
+    m = tuple(matrix)
+    if np is not None and isinstance(normals, np.ndarray):
+        result = normals.dot(np.array(m).reshape(4, 4)[:3, :3])
+        lengths = np.sqrt((result * result).sum(axis=1))
+        lengths[lengths == 0.0] = 1.0
+        return result / lengths[:, None]
+    result = list()
+    for x, y, z in _transformPoints(normals, m[:12] + (0.0, 0.0, 0.0, 1.0)):
+        length = _length(x, y, z) or 1.0
+        result.append((x / length, y / length, z / length))
+    return result
+
+
+def _matrixArray(matrices):
+    # Packs `matrices` (flat floats or a sequence of matrices) as array('d').
+    if isinstance(matrices, array.array):
+        return array.array('d', matrices)
+    if np is not None and isinstance(matrices, np.ndarray):
+        return _toArray(matrices)
+    values = array.array('d')
+    for m in matrices:
+        if isinstance(m, (int, float)):
+            values.append(m)
+            continue
+        if hasattr(m, 'asMatrix'):
+            m = m.asMatrix()
+        values.extend(tuple(m))
+    return values
+
+
+def _multiplyMatrices(matrices, matrix):
+    # Multiplies each matrix in the flat array `matrices` by `matrix`.
+    if np is not None:
+        a = np.frombuffer(matrices, dtype=float).reshape(-1, 4, 4)
+        b = np.array(matrix, dtype=float).reshape(4, 4)
+        return _toArray(a.dot(b))
+    result = array.array('d')
+    for i in xrange(0, len(matrices), 16):
+        a = matrices[i:i + 16]
+        result.extend(sum(a[r * 4 + k] * matrix[k * 4 + c]
+                          for k in xrange(4))
+                      for r in xrange(4) for c in xrange(4))
+    return result
+
+
+def _instancePoints(points, matrices, scales=None):
+    # Transforms packed `points` by every matrix (flat array) in `matrices`,
+    # optionally scaling them per instance first (one scale per matrix).
+    # Returns a flat array.
+    count = len(matrices) // 16
+    if scales is not None and len(scales) != count:
+        raise ValueError('Expected {} scales, got {}'.format(
+            count, len(scales)))
+    if np is not None:
+        m = np.frombuffer(matrices, dtype=float).reshape(-1, 4, 4)
+        pts = np.array(points, dtype=float).reshape(-1, 3)
+        rot = m[:, :3, :3]
+        if scales is not None:
+            rot = rot * np.array(scales, dtype=float)[:, None, None]
+        result = np.einsum('vj,njk->nvk', pts, rot) + m[:, None, 3, :3]
+        return _toArray(result)
+    result = array.array('d')
+    for i in xrange(count):
+        m = matrices[i * 16:(i + 1) * 16]
+        if scales is not None:
+            s = scales[i]
+            m = [x * s for x in m[:12]] + list(m[12:])
+        for x, y, z in _transformPoints(points, m):
+            result.extend((x, y, z))
+    return result
+
+
+def _transformPoints(points, matrix):
+    # Applies an affine `MMatrix` (row vectors) to packed points, (N, 3)
+    # NumPy arrays are transformed at once by a single matrix product.
+    m = tuple(matrix)
+    if np is not None and isinstance(points, np.ndarray):
+        m = np.array(m).reshape(4, 4)
+        return points.dot(m[:3, :3]) + m[3, :3]
+    return [(x * m[0] + y * m[4] + z * m[8] + m[12],
+             x * m[1] + y * m[5] + z * m[9] + m[13],
+             x * m[2] + y * m[6] + z * m[10] + m[14]) for x, y, z in points]
+
+
+# === Piecewise curves ===
+
+# A global `CURVE_BEZIER` is handled as a curve with a single span, while
+# piecewise curves are made of cubic spans, each one evaluated from 4 control
+# points with a basis matrix cached per (curve type, samples). As every span
+# only depends on a handful of control points, moving one of them just needs
+# the spans around it to be tessellated again.
+_splineCache = dict()
+
+
+def _clamp(value, minimum, maximum):
+    return max(minimum, min(value, maximum))
+
+
+def _splineSpans(degree, count):
+    if degree == CURVE_BEZIER:
+        return 1 if count > 1 else 0
+    if degree == CURVE_CUBIC_BEZIER:
+        return max((count - 1) // 3, 0)
+    if degree == CURVE_CATMULLROM:
+        return max(count - 1, 0)
+    if degree == CURVE_BSPLINE:
+        # end points are repeated to clamp the curve
+        return count + 1 if count > 1 else 0
+    return 0
+
+
+def _checkSplinePoints(degree, count):
+    # Cubic bezier spans share their end points, points past the last whole
+    # span wouldn't be drawn.
+    if degree == CURVE_CUBIC_BEZIER and count and (count - 1) % 3:
+        raise ValueError('Expected 3n + 1 cubic bezier points, got {}'.format(
+            count))
+
+
+def _splineSpanPoints(degree, span, count):
+    last = count - 1
+    if degree == CURVE_BEZIER:
+        return range(count)
+    if degree == CURVE_CUBIC_BEZIER:
+        return range(span * 3, span * 3 + 4)
+    if degree == CURVE_CATMULLROM:
+        return [_clamp(i, 0, last) for i in xrange(span - 1, span + 3)]
+    return [_clamp(i, 0, last) for i in xrange(span - 2, span + 2)]
+
+
+def _splineSpansForPoint(degree, index, count):
+    numSpans = _splineSpans(degree, count)
+    if degree == CURVE_BEZIER:
+        first, last = 0, 0
+    elif degree == CURVE_CUBIC_BEZIER:
+        first, last = (index - 1) // 3, index // 3
+    elif degree == CURVE_CATMULLROM:
+        first, last = index - 2, index + 1
+    else:
+        first, last = index - 1, index + 2
+    return xrange(max(first, 0), min(last, numSpans - 1) + 1)
+
+
+def _splineBasis(degree, samples):
+    if degree == CURVE_CUBIC_BEZIER:
+        return bernsteinBasis(3, samples)
+
+    key = (degree, samples)
+    basis = _splineCache.get(key)
+    if basis is not None:
+        return basis
+
+    rows = list()
+    for s in xrange(samples):
+        t = s / float(samples - 1) if samples > 1 else 0.0
+        t2 = t * t
+        t3 = t2 * t
+        if degree == CURVE_CATMULLROM:
+            rows.append((0.5 * (-t3 + 2.0 * t2 - t),
+                         0.5 * (3.0 * t3 - 5.0 * t2 + 2.0),
+                         0.5 * (-3.0 * t3 + 4.0 * t2 + t),
+                         0.5 * (t3 - t2)))
+        else:
+            u = 1.0 - t
+            rows.append((u * u * u / 6.0,
+                         (3.0 * t3 - 6.0 * t2 + 4.0) / 6.0,
+                         (-3.0 * t3 + 3.0 * t2 + 3.0 * t + 1.0) / 6.0,
+                         t3 / 6.0))
+    basis = np.array(rows, dtype=float) if np is not None else tuple(rows)
+    _splineCache[key] = basis
+    return basis
+
+
+# === Adaptive tessellation ===
+
+# Second derivative weights (at t=0 and t=1) of each cubic basis, the second
+# derivative of a cubic is linear so its maximum magnitude is reached at one
+# of the ends of the span.
+_secondDerivatives = {
+    CURVE_CUBIC_BEZIER: ((6.0, -12.0, 6.0, 0.0), (0.0, 6.0, -12.0, 6.0)),
+    CURVE_CATMULLROM: ((2.0, -5.0, 4.0, -1.0), (-1.0, 4.0, -5.0, 2.0)),
+    CURVE_BSPLINE: ((1.0, -2.0, 1.0, 0.0), (0.0, 1.0, -2.0, 1.0)),
+}
+
+
+def _length(x, y, z):
+    return math.sqrt(x * x + y * y + z * z)
+
+
+def _polygonLength(points):
+    return sum(_length(b[0] - a[0], b[1] - a[1], b[2] - a[2])
+               for a, b in zip(points, points[1:]))
+
+
+def _normalize(vector):
+    length = _length(*vector) or 1.0
+    return tuple(x / length for x in vector)
+
+
+def _bounds(values):
+    # Bounding box of flat (x, y, z, x, y, z...) `values`, `None` if empty.
+    if not len(values):
+        return None
+    if np is not None:
+        points = np.frombuffer(values, dtype=np.float64).reshape(-1, 3)
+        return (tuple(points.min(axis=0).tolist()),
+                tuple(points.max(axis=0).tolist()))
+    xs, ys, zs = values[0::3], values[1::3], values[2::3]
+    return (min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs))
+
+
+def _unionBounds(a, b):
+    if a is None or b is None:
+        return a or b
+    return (tuple(map(min, a[0], b[0])), tuple(map(max, a[1], b[1])))
+
+
+def _centroid(points):
+    n = float(len(points))
+    return (sum(p[0] for p in points) / n, sum(p[1] for p in points) / n,
+            sum(p[2] for p in points) / n)
+
+
+def _flatnessSegments(degree, points, tolerance):
+    # Uniformly sampling a curve in N segments keeps it within
+    # max(|C''|) / (8 * N^2) of its tessellation.
+    if degree == CURVE_BEZIER:
+        # Wang's formula, bound the second derivative from control points
+        n = len(points) - 1
+        bound = 0.0
+        for a, b, c in zip(points, points[1:], points[2:]):
+            bound = max(bound, _length(a[0] - 2.0 * b[0] + c[0],
+                                       a[1] - 2.0 * b[1] + c[1],
+                                       a[2] - 2.0 * b[2] + c[2]))
+        bound *= n * (n - 1)
+    else:
+        bound = 0.0
+        for weights in _secondDerivatives[degree]:
+            bound = max(bound, _length(
+                *[sum(w * p[i] for w, p in zip(weights, points))
+                  for i in range(3)]))
+    return math.sqrt(bound / (8.0 * tolerance))
+
+
+# === Headless mode ===
+
+# Without Maya, `om2` and `omr` point to the pure Python stand-ins below. They
+# cover just what `mscreen` needs (OpenMaya math types and OpenGL constants),
+# using the same conventions as Maya: row vectors, `point * matrix`.
+
+class _MSpace(object):
+    kInvalid = 0
+    kTransform = 1
+    kPreTransform = kObject = 2
+    kPostTransform = 3
+    kWorld = 4
+
+
+class _MVector(object):
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])[:3]
+        args = tuple(args) + (0.0, ) * (3 - len(args))
+        self.x, self.y, self.z = [float(x) for x in args[:3]]
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z)[index]
+
+    def __eq__(self, other):
+        return tuple(self)[:3] == tuple(other)[:3]
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __add__(self, other):
+        return _MVector(self.x + other[0], self.y + other[1],
+                        self.z + other[2])
+
+    def __sub__(self, other):
+        return _MVector(self.x - other[0], self.y - other[1],
+                        self.z - other[2])
+
+    def __neg__(self):
+        return _MVector(-self.x, -self.y, -self.z)
+
+    def __mul__(self, other):
+        if isinstance(other, _MMatrix):  # direction, no translation
+            m = other._values
+            return _MVector(
+                self.x * m[0] + self.y * m[4] + self.z * m[8],
+                self.x * m[1] + self.y * m[5] + self.z * m[9],
+                self.x * m[2] + self.y * m[6] + self.z * m[10])
+        if isinstance(other, _MVector):  # dot product
+            return self.x * other.x + self.y * other.y + self.z * other.z
+        return _MVector(self.x * other, self.y * other, self.z * other)
+
+    __rmul__ = __mul__
+
+    def __xor__(self, other):  # cross product
+        return _MVector(self.y * other[2] - self.z * other[1],
+                        self.z * other[0] - self.x * other[2],
+                        self.x * other[1] - self.y * other[0])
+
+    def length(self):
+        return _length(self.x, self.y, self.z)
+
+    def normal(self):
+        return _MVector(_normalize(tuple(self)))
+
+    def rotateTo(self, other):
+        a, b = self.normal(), _MVector(other).normal()
+        dot = a * b
+        if dot < -1.0 + 1e-9:  # opposite, half turn around any normal
+            axis = a ^ (1.0, 0.0, 0.0)
+            if axis.length() < 1e-9:
+                axis = a ^ (0.0, 1.0, 0.0)
+            return _MQuaternion(*(tuple(axis.normal()) + (0.0, )))
+        axis = a ^ b
+        w = math.sqrt((1.0 + dot) * 2.0)
+        return _MQuaternion(axis.x / w, axis.y / w, axis.z / w, w * 0.5)
+
+    def __repr__(self):
+        return '{}({}, {}, {})'.format(
+            type(self).__name__[1:], self.x, self.y, self.z)
+
+
+class _MPoint(_MVector):
+    def __init__(self, *args):
+        values = tuple(args[0]) if len(args) == 1 else args
+        super(_MPoint, self).__init__(*values[:3])
+        self.w = float(values[3]) if len(values) > 3 else 1.0
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z, self.w))
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z, self.w)[index]
+
+    def __sub__(self, other):
+        return _MVector(self.x - other[0], self.y - other[1],
+                        self.z - other[2])
+
+    def __mul__(self, other):
+        if isinstance(other, _MMatrix):
+            p = tuple(self)
+            m = other._values
+            return _MPoint([sum(p[k] * m[k * 4 + c] for k in xrange(4))
+                            for c in xrange(4)])
+        return _MPoint(self.x * other, self.y * other, self.z * other,
+                       self.w)
+
+
+class _MQuaternion(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=1.0):
+        self.x, self.y, self.z, self.w = x, y, z, w
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z, self.w))
+
+    def asMatrix(self):
+        x, y, z, w = self.x, self.y, self.z, self.w
+        return _MMatrix((
+            1 - 2 * (y * y + z * z), 2 * (x * y + z * w), 2 * (x * z - y * w),
+            0.0,
+            2 * (x * y - z * w), 1 - 2 * (x * x + z * z), 2 * (y * z + x * w),
+            0.0,
+            2 * (x * z + y * w), 2 * (y * z - x * w), 1 - 2 * (x * x + y * y),
+            0.0,
+            0.0, 0.0, 0.0, 1.0))
+
+
+class _MMatrix(object):
+    def __init__(self, values=None):
+        values = _IDENTITY if values is None else tuple(values)
+        if len(values) == 4:  # rows
+            values = tuple(itertools.chain.from_iterable(values))
+        self._values = tuple(float(x) for x in values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return 16
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __eq__(self, other):
+        return isinstance(other, _MMatrix) and self._values == other._values
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __mul__(self, other):
+        return _MMatrix(_multiply4(self._values, tuple(other)))
+
+    def getElement(self, row, column):
+        return self._values[row * 4 + column]
+
+    def transpose(self):
+        return _MMatrix(self._values[c * 4 + r]
+                        for r in xrange(4) for c in xrange(4))
+
+    def inverse(self):
+        # Gauss-Jordan elimination with partial pivoting.
+        rows = [list(self._values[r * 4:r * 4 + 4]) +
+                [float(r == c) for c in xrange(4)] for r in xrange(4)]
+        for c in xrange(4):
+            pivot = max(xrange(c, 4), key=lambda r: abs(rows[r][c]))
+            rows[c], rows[pivot] = rows[pivot], rows[c]
+            value = rows[c][c]
+            rows[c] = [x / value for x in rows[c]]
+            for r in xrange(4):
+                if r != c and rows[r][c]:
+                    f = rows[r][c]
+                    rows[r] = [x - f * y for x, y in zip(rows[r], rows[c])]
+        return _MMatrix(rows[r][4 + c] for r in xrange(4) for c in xrange(4))
+
+    def __repr__(self):
+        return 'MMatrix({})'.format(self._values)
+
+
+class _MTransformationMatrix(object):
+    kInvalid, kXYZ, kYZX, kZXY, kXZY, kYXZ, kZYX = xrange(7)
+    _axes = {kXYZ: 'xyz', kYZX: 'yzx', kZXY: 'zxy', kXZY: 'xzy', kYXZ: 'yxz',
+             kZYX: 'zyx'}
+
+    def __init__(self, other=None):
+        self._translation = [0.0, 0.0, 0.0]
+        self._rotation = _MMatrix()
+        self._scale = [1.0, 1.0, 1.0]
+        if isinstance(other, _MTransformationMatrix):
+            self._translation = list(other._translation)
+            self._rotation = other._rotation
+            self._scale = list(other._scale)
+        elif other is not None:
+            # decomposition of an affine matrix (shear is not supported)
+            m = tuple(_MMatrix(other))
+            self._translation = list(m[12:15])
+            self._scale = [_length(*m[i * 4:i * 4 + 3]) for i in xrange(3)]
+            rows = [[x / (s or 1.0) for x in m[i * 4:i * 4 + 3]] + [0.0]
+                    for i, s in enumerate(self._scale)]
+            self._rotation = _MMatrix(rows + [[0.0, 0.0, 0.0, 1.0]])
+
+    def __eq__(self, other):
+        return isinstance(other, _MTransformationMatrix) and \
+            self.asMatrix() == other.asMatrix()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def asMatrix(self):
+        m = self._rotation._values
+        s = self._scale
+        return _MMatrix(
+            [m[i] * s[0] for i in xrange(3)] + [0.0] +
+            [m[4 + i] * s[1] for i in xrange(3)] + [0.0] +
+            [m[8 + i] * s[2] for i in xrange(3)] + [0.0] +
+            self._translation + [1.0])
+
+    def translation(self, space):
+        return _MVector(self._translation)
+
+    def setTranslation(self, vector, space):
+        self._translation = list(_MVector(vector))
+        return self
+
+    def translateBy(self, vector, space):
+        self._translation = [a + b for a, b in
+                             zip(self._translation, _MVector(vector))]
+        return self
+
+    def scale(self, space):
+        return list(self._scale)
+
+    def setScale(self, scale, space):
+        self._scale = [float(x) for x in scale]
+        return self
+
+    def scaleBy(self, scale, space):
+        self._scale = [a * b for a, b in zip(self._scale, scale)]
+        return self
+
+    def setRotation(self, rotation):
+        self._rotation = rotation.asMatrix()
+        return self
+
+    def rotateByComponents(self, components, space, asQuaternion=False):
+        if asQuaternion:
+            delta = _MQuaternion(*components).asMatrix()
         else:
-            rval += v
-    return rval
+            x, y, z, order = components
+            delta = _MMatrix()
+            angles = {'x': x, 'y': y, 'z': z}
+            for axis in self._axes[order]:
+                delta = delta * _axisRotation(axis, angles[axis])
+        if space == _MSpace.kObject:
+            self._rotation = delta * self._rotation
+        else:
+            self._rotation = self._rotation * delta
+        return self
+
+
+def _multiply4(a, b):
+    # Product of two 4x4 matrices given as flat (row major) sequences.
+    return [a[r * 4] * b[c] + a[r * 4 + 1] * b[4 + c] +
+            a[r * 4 + 2] * b[8 + c] + a[r * 4 + 3] * b[12 + c]
+            for r in xrange(4) for c in xrange(4)]
+
+
+def _axisRotation(axis, angle):
+    c, s = math.cos(angle), math.sin(angle)
+    if axis == 'x':
+        return _MMatrix((1, 0, 0, 0, 0, c, s, 0, 0, -s, c, 0, 0, 0, 0, 1))
+    if axis == 'y':
+        return _MMatrix((c, 0, -s, 0, 0, 1, 0, 0, s, 0, c, 0, 0, 0, 0, 1))
+    return _MMatrix((c, s, 0, 0, -s, c, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1))
+
+
+class _OpenMayaStandIn(object):
+    # Namespace replacing `maya.api.OpenMaya` in headless mode.
+    MSpace = _MSpace
+    MVector = _MVector
+    MPoint = _MPoint
+    MQuaternion = _MQuaternion
+    MMatrix = _MMatrix
+    MTransformationMatrix = _MTransformationMatrix
+
+    class MObject(object):
+        pass
+
+    class MDagPath(object):
+        pass
+
+
+class _OpenMayaRenderStandIn(object):
+    # Namespace replacing `maya.OpenMayaRender` in headless mode (OpenGL
+    # constants only, values as defined by OpenGL).
+    MGL_POINTS = 0x0000
+    MGL_LINES = 0x0001
+    MGL_LINE_STRIP = 0x0003
+    MGL_TRIANGLES = 0x0004
+    MGL_CURRENT_BIT = 0x0001
+    MGL_POINT_BIT = 0x0002
+    MGL_LINE_BIT = 0x0004
+    MGL_LIGHTING_BIT = 0x0040
+    MGL_SMOOTH = 0x1D01
+    MGL_UNSIGNED_INT = 0x1405
+    MGL_DOUBLE = 0x140A
+    MGL_VERTEX_ARRAY = 0x8074
+    MGL_NORMAL_ARRAY = 0x8075
+    MGL_COLOR_ARRAY = 0x8076
+
+
+if HEADLESS:
+    om2 = _OpenMayaStandIn
+    omr = _OpenMayaRenderStandIn
+
+
+def _releaseCallbacks():
+    # Removes the drawing callbacks (and stats display) registered on Maya by
+    # any `SceneManager` (even the ones from a previous import of this
+    # module).
+    ids = list()
+    if hasattr(maya, "mscreen_callback"):  # single panel versions
+        ids.append(maya.mscreen_callback)
+        del maya.mscreen_callback
+    for each in getattr(maya, "mscreen_callbacks", dict()).values():
+        ids.extend(each)
+    maya.mscreen_callbacks = dict()
+    for each in ids:
+        try:
+            omui.MUiMessage.removeCallback(each)
+        except RuntimeError:  # deleted panel
+            pass
+    # the stats display would keep calling into the released manager (it's
+    # only looked up if shown, so importing doesn't touch Maya's UI)
+    if getattr(maya, "mscreen_hud", False):
+        if mc.headsUpDisplay(STATS_HUD, exists=True):
+            mc.headsUpDisplay(STATS_HUD, remove=True)
+        maya.mscreen_hud = False
+
 
 # === Accessors ===
-_scn = SceneManager()  # singleton
-clear = _scn.clear
-refresh = _scn.refresh
-drawCurve = _scn.drawCurve
-drawTransform = _scn.drawTransform
-drawPoint = _scn.drawPoint
-drawTriangle = _scn.drawTriangle
-erase = _scn.unregisterPrimitive
-registerCallback = _scn.registerCallback
+
+# The `SceneManager` singleton is created on first use (i.e. the first time
+# something gets drawn), so importing `mscreen` doesn't touch Maya's UI. On
+# reload the callbacks of the previous singleton are released right away.
+_scn = None
+if not HEADLESS:
+    _releaseCallbacks()
+
+
+def getSceneManager():
+    """
+    Returns the `SceneManager` singleton, creating it if needed.
+    """
+    global _scn
+    if _scn is None:
+        _scn = SceneManager()
+    return _scn
+
+
+def _accessor(name, create=True):
+    # Module level function calling `name` on the singleton, accessors not
+    # allowed to `create` it do nothing until it exists.
+    def accessor(*args, **kwargs):
+        if _scn is None and not create:
+            return None
+        return getattr(getSceneManager(), name)(*args, **kwargs)
+    accessor.__doc__ = getattr(SceneManager, name).__doc__
+    return accessor
+
+
+clear = _accessor("clear", create=False)
+refresh = _accessor("refresh", create=False)
+drawCurve = _accessor("drawCurve")
+drawTransform = _accessor("drawTransform")
+drawPoint = _accessor("drawPoint")
+drawPoints = _accessor("drawPoints")
+drawParticles = _accessor("drawParticles")
+drawGlyphs = _accessor("drawGlyphs")
+drawTriangle = _accessor("drawTriangle")
+drawMesh = _accessor("drawMesh")
+drawMeshMirror = _accessor("drawMeshMirror")
+erase = _accessor("unregisterPrimitive", create=False)
+eraseLayer = _accessor("eraseLayer", create=False)
+save = _accessor("save")
+stream = _accessor("stream")
+listen = _accessor("listen")
+load = _accessor("load")
+setLayerVisible = _accessor("setLayerVisible")
+setPanelVisible = _accessor("setPanelVisible")
+registerCallback = _accessor("registerCallback")
+enableProfiler = _accessor("enableProfiler")
+showStats = _accessor("showStats")
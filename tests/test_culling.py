@@ -0,0 +1,17 @@
+import random
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_GLYPHS = 5000
+
+# Lots of small primitives scattered around, only the ones in front of the
+# camera get drawn (orbit around to see it in action).
+for i in range(NUM_GLYPHS):
+    pos = (random.uniform(-200, 200), 0, random.uniform(-200, 200))
+    mscreen.drawCurve([pos, (pos[0], 1, pos[2])], color=mscreen.COLOR_CYAN)
+
+# culling can be disabled for debugging purposes
+mscreen.getSceneManager().culling = True
+
+mscreen.refresh()
@@ -0,0 +1,42 @@
+import math
+import maya.api._OpenMaya_py2 as om2
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_JOINTS = 500
+
+
+def spiral(offset=0.0):
+    matrices = []
+    for i in range(NUM_JOINTS):
+        angle = i * 0.1 + offset
+        xfo = om2.MTransformationMatrix()
+        xfo.setTranslation(om2.MVector(math.cos(angle) * 5.0, i * 0.05,
+                                       math.sin(angle) * 5.0),
+                           om2.MSpace.kWorld)
+        xfo.setRotation(om2.MEulerRotation(0.0, -angle, 0.0))
+        matrices.append(xfo)
+    return matrices
+
+# one primitive for all transforms (instead of 500 `TransformPrim`s)
+axes = mscreen.drawGlyphs(spiral(), scales=[0.5] * NUM_JOINTS)
+
+# arrows along the x axis, one color per instance
+arrows = mscreen.drawGlyphs(spiral(), glyph=mscreen.GLYPH_ARROW,
+                            colors=[mscreen.linearInterpolate(
+                                i / float(NUM_JOINTS), mscreen.COLOR_YELLOW,
+                                mscreen.COLOR_RED)
+                                for i in range(NUM_JOINTS)])
+arrows.move(y=5)
+
+
+# updating all instances is a single assignment
+def spin(glyphs, state={'offset': 0.0}):
+    state['offset'] += 0.05
+    glyphs.matrices = spiral(state['offset'])
+    return True
+
+axes.registerCallback(spin)
+
+mscreen.refresh()
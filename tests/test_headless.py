@@ -0,0 +1,71 @@
+# Runs outside of Maya (plain Python): OpenMaya math types are replaced by
+# pure Python stand-ins and drawing is recorded by a `RecordingBackend`.
+import mscreen
+
+
+curve = mscreen.drawCurve([(0, 0, 0), (5, 10, 0), (10, -10, 0), (15, 0, 0)],
+                          degree=mscreen.CURVE_BEZIER)
+xfo = mscreen.drawTransform()
+xfo.rotate(0, 0, 45)
+point = mscreen.drawPoint((1, 0, 0), color=mscreen.COLOR_RED)
+point.parent = xfo
+
+# in headless mode refreshing draws right away
+mscreen.refresh()
+
+commands = mscreen.getSceneManager().backend.commands
+for command in commands:
+    print(command)
+
+# points and lines keep their own size state, lines as wide as the points
+# drawn before them still set their width
+assert ('glPointSize', 2) in commands and ('glLineWidth', 2) in commands
+
+# cubic bezier curves are made of whole spans (3n + 1 points), either when
+# setting the points or the degree
+spline = mscreen.CurvePrim([(i, 0, 0) for i in range(7)],
+                           degree=mscreen.CURVE_CUBIC_BEZIER)
+errors = list()
+try:
+    spline.points = [(i, 0, 0) for i in range(6)]
+except ValueError as e:
+    errors.append(str(e))
+spline.degree = mscreen.CURVE_LINEAR
+spline.points = [(i, 0, 0) for i in range(6)]
+try:
+    spline.degree = mscreen.CURVE_CUBIC_BEZIER
+except ValueError as e:
+    errors.append(str(e))
+print(errors)
+assert len(errors) == 2 and spline.degree == mscreen.CURVE_LINEAR
+
+# point clouds take a single color/size or one per point, nothing else
+cloud = mscreen.PointCloudPrim([(0, 0, 0), (1, 0, 0)], sizes=[1, 2])
+try:
+    cloud.append([(2, 0, 0), (3, 0, 0)], colors=[mscreen.COLOR_RED] * 3)
+except ValueError as e:
+    print(e)
+else:
+    raise AssertionError('Expected a ValueError')
+assert len(cloud.positions) == len(cloud.colors) == 3 * len(cloud) == 6
+
+# meshes check their indices, colors and normals against the vertices
+triangle = [(0, 0, 0), (1, 0, 0), (0, 1, 0)]
+for indices, colors in (([0, 1, 7], None), ([0, 1], None),
+                        ([0, 1, 2], [mscreen.COLOR_RED])):
+    try:
+        mscreen.MeshPrim(triangle, indices, colors=colors).update()
+    except ValueError as e:
+        print(e)
+    else:
+        raise AssertionError('Expected a ValueError')
+
+# handles are per scene, registering a primitive on another scene moves it
+# (even if the handle numbers collide)
+scenes = mscreen.SceneManager(), mscreen.SceneManager()
+first, second = mscreen.PointPrim(), mscreen.PointPrim()
+scenes[0].registerPrimitive(first)
+scenes[1].registerPrimitive(second)
+scenes[0].registerPrimitive(second)
+assert scenes[0].getPrimitive(first._handle) is first
+assert second._scene is scenes[0] and not scenes[1].getPrimitive(1)
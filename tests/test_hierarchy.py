@@ -0,0 +1,24 @@
+import maya.cmds as cmds
+
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+# primitives can be parented to other primitives, their transforms are
+# relative to the parent (like Maya's DAG).
+root = mscreen.drawTransform()
+arm = mscreen.drawCurve([(0, 0, 0), (4, 0, 0)], color=mscreen.COLOR_RED)
+arm.parent = root
+hand = mscreen.drawPoint((4, 0, 0), color=mscreen.COLOR_YELLOW, size=8)
+hand.parent = arm
+
+# ...or to Maya DAG nodes (world space)
+node = cmds.createNode('transform', parent=cmds.createNode('transform'))
+cmds.setAttr(cmds.listRelatives(node, parent=True)[0] + '.ty', 3)
+root.parent = node
+
+# moving the root moves the whole hierarchy
+root.rotate(0, 0, 45)
+cmds.setAttr(node + '.tx', 2)
+
+mscreen.refresh()
@@ -0,0 +1,27 @@
+import random
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_POINTS = 10000
+
+# Primitives drawn while `layer` is set end up on that layer...
+mscreen.getSceneManager().layer = "debris"
+points = [mscreen.drawPoint((random.uniform(-5, 5),
+                             random.uniform(0, 10),
+                             random.uniform(-5, 5)),
+                            color=mscreen.COLOR_CYAN)
+          for i in range(NUM_POINTS)]
+mscreen.getSceneManager().layer = None
+curve = mscreen.drawCurve([(-5, 0, 0), (5, 0, 0)], color=mscreen.COLOR_RED)
+
+# erase half of the points in one call, hide the rest...
+mscreen.erase(points[::2])
+mscreen.setLayerVisible("debris", False)
+mscreen.refresh()
+
+# ...and bring them back before erasing the whole layer
+mscreen.setLayerVisible("debris", True)
+mscreen.refresh()
+mscreen.eraseLayer("debris")
+mscreen.refresh()
@@ -0,0 +1,21 @@
+import random
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_TRANSFORMS = 1000
+
+# Far away gizmos get simplified: curves are decimated, vectors lose their
+# arrow heads and tiny transforms are drawn as points.
+mscreen.getSceneManager().lodPolicy = mscreen.LodPolicy(reduced=64, minimal=8)
+
+for i in range(NUM_TRANSFORMS):
+    xfo = mscreen.drawTransform()
+    xfo.move(random.uniform(-500, 500), 0, random.uniform(-500, 500))
+
+# a policy can also be set per primitive
+curve = mscreen.drawCurve([(0, 0, 0), (5, 10, 0), (10, -10, 0), (15, 0, 0)],
+                          degree=mscreen.CURVE_BEZIER)
+curve.lodPolicy = mscreen.LodPolicy(reduced=256, minimal=32)
+
+mscreen.refresh()
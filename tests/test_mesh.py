@@ -0,0 +1,33 @@
+import math
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+# a grid of shared vertices, each quad made of 2 indexed triangles
+RESOLUTION = 100
+SIZE = 10.0
+
+vertices = []
+colors = []
+for i in range(RESOLUTION + 1):
+    for j in range(RESOLUTION + 1):
+        x = (i / float(RESOLUTION) - 0.5) * SIZE
+        z = (j / float(RESOLUTION) - 0.5) * SIZE
+        y = math.sin(x) * math.cos(z)
+        vertices.append((x, y, z))
+        # let's visualize the height as a weight map
+        colors.append(mscreen.linearInterpolate(
+            (y + 1.0) * 0.5, mscreen.COLOR_BLUE, mscreen.COLOR_RED))
+
+triangles = []
+for i in range(RESOLUTION):
+    for j in range(RESOLUTION):
+        a = i * (RESOLUTION + 1) + j
+        b = a + RESOLUTION + 1
+        triangles.append((a, b, a + 1))
+        triangles.append((a + 1, b, b + 1))
+
+mesh = mscreen.drawMesh(vertices, triangles, colors=colors)
+mesh.move(y=2)
+
+mscreen.refresh()
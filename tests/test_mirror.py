@@ -0,0 +1,20 @@
+import maya.cmds as cmds
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+# a dense mesh deformed by a soft cluster
+sphere = cmds.polySphere(subdivisionsX=200, subdivisionsY=200)[0]
+cmds.softSelect(softSelectEnabled=True, softSelectDistance=0.5)
+cmds.select(sphere + '.vtx[19999]')
+handle = cmds.cluster()[1]
+cmds.softSelect(softSelectEnabled=False)
+cmds.setKeyframe(handle, attribute='translateY', time=1, value=0)
+cmds.setKeyframe(handle, attribute='translateY', time=24, value=2)
+
+# the mirror reads the mesh whenever it gets dirty, but only modified
+# vertices (the ones around the cluster) get pushed to the viewport
+mirror = mscreen.drawMeshMirror(sphere, color=mscreen.COLOR_LIGHTCYAN)
+mirror.move(x=3)
+
+mscreen.refresh()
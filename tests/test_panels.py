@@ -0,0 +1,21 @@
+import maya.cmds as cmds
+
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+# switch to the four view layout, primitives get drawn on every model panel
+cmds.FourViewLayout()
+panels = cmds.getPanel(type="modelPanel")
+
+curve = mscreen.drawCurve([(0, 0, 0), (5, 10, 0), (10, -10, 0), (15, 0, 0)],
+                          degree=mscreen.CURVE_BEZIER)
+
+# ...unless restricted to some of them
+point = mscreen.drawPoint((0, 5, 0), color=mscreen.COLOR_RED, size=10)
+point.panels = panels[:1]
+
+# whole panels can be hidden too
+mscreen.setPanelVisible(panels[-1], False)
+
+mscreen.refresh()
@@ -9,6 +9,10 @@ points = ((3, 2), (-3, 0), (3, -2), (-1, 3), (-1, -3), (3, 2))
 star = mscreen.drawCurve(points, color=mscreen.COLOR_LIGHTYELLOW)
 
 # parent the curve to a transform node
-star.parent = cmds.createNode('transform')
+node = cmds.createNode('transform')
+star.parent = node
+
+# the curve gets updated only when its parent changes
+cmds.setAttr(node + '.translateY', 2)
 
 mscreen.refresh()
@@ -0,0 +1,38 @@
+import tempfile
+import maya.api._OpenMaya_py2 as om2
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+# Same setup as `test_stress.py`, but simulating all particles at once (see
+# `mscreen.ParticlePrim`), this scales to hundreds of thousands particles.
+RATE = 2000
+
+ps = mscreen.drawParticles(color=mscreen.COLOR_DARKCYAN, size=5)
+
+# main particles (state=0)
+ps.addEmitter(mscreen.ParticleEmitter(position=(0.0, 0.01, -10.0),
+                                      velocity=(0.0, 1.5, 0.5), rate=RATE,
+                                      spread=(0.1, 0.1, 0.1)))
+ps.addForce(lambda positions, velocities, ages: (0.0, -0.098, 0.0))
+ps.setAgeLimit(50)
+
+# particles on collision (state=1)
+state = ps.addState(color=mscreen.COLOR_GRAY, size=2, ageLimit=5)
+ps.addForce(mscreen.bounceForce(
+    height=0.0, restitution=0.5,
+    callback=lambda positions: ps.emit(positions, state=state)))
+
+# simulated frames are cached (up to 512MB, spilling to disk beyond that)
+# so scrubbing and looped playback replay them
+ps.cache = mscreen.FrameCache(budget=512 * 1024 * 1024,
+                              directory=tempfile.gettempdir())
+
+# get current time
+sel = om2.MSelectionList()
+sel.add("time1")
+fnTime = om2.MFnDependencyNode(sel.getDependNode(0))
+time = fnTime.findPlug("outTime", False)
+
+# mscreen "magic"
+mscreen.registerCallback(lambda: ps.simulate(time.asMTime().value))
@@ -0,0 +1,30 @@
+import random
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_POINTS = 20000
+
+# all points live in a single primitive (contiguous arrays)
+cloud = mscreen.drawPoints(color=mscreen.COLOR_DARKCYAN, size=3)
+cloud.append([(random.uniform(-10, 10), random.uniform(0, 10),
+               random.uniform(-10, 10)) for _ in range(NUM_POINTS)])
+
+# per point colors/sizes are also supported
+cloud.append([(0, 12, 0), (2, 12, 0), (4, 12, 0)],
+             colors=(mscreen.COLOR_RED, mscreen.COLOR_GREEN,
+                     mscreen.COLOR_BLUE),
+             sizes=(6, 8, 10))
+
+
+# bulk updates: move everything up and remove the points going too high
+def rise(cloud):
+    positions = cloud.positions
+    cloud.setPositions([x + 0.05 if i % 3 == 1 else x
+                        for i, x in enumerate(positions)])
+    cloud.remove([positions[i * 3 + 1] > 15.0 for i in range(len(cloud))])
+    return len(cloud) > 0
+
+cloud.registerCallback(rise)
+
+mscreen.refresh()
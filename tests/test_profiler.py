@@ -0,0 +1,27 @@
+import random
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_CURVES = 1000
+
+
+def wiggle():
+    for each in curves[:100]:
+        each.move(0, random.uniform(-0.1, 0.1), 0)
+
+curves = list()
+for i in range(NUM_CURVES):
+    x, z = random.uniform(-50, 50), random.uniform(-50, 50)
+    curves.append(mscreen.drawCurve([(x, 0, z), (x, 1, z), (x + 1, 2, z)]))
+mscreen.registerCallback(wiggle)
+
+# per frame timings and counters are shown on the viewport (heads up
+# display) and can be queried from the scene manager
+mscreen.showStats()
+mscreen.refresh()
+
+stats = mscreen.getSceneManager().stats
+if stats is not None:
+    print(stats.summary())
+    print(stats.asDict())
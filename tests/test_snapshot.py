@@ -0,0 +1,28 @@
+import os
+import random
+import tempfile
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_POINTS = 1000000
+PATH = os.path.join(tempfile.gettempdir(), "mscreen_snapshot.msc")
+
+# an offline debug trace: a huge point cloud plus some annotations
+positions = [(random.uniform(-50, 50), random.uniform(0, 10),
+              random.uniform(-50, 50)) for i in range(NUM_POINTS)]
+mscreen.drawPoints(positions, color=mscreen.COLOR_DARKCYAN)
+mscreen.setLayerVisible("contacts", True)
+mscreen.getSceneManager().layer = "contacts"
+for i in range(10):
+    curve = mscreen.drawCurve([(i * 10 - 50, 0, 0), (i * 10 - 45, 20, 0),
+                               (i * 10 - 40, 0, 0)],
+                              degree=mscreen.CURVE_BEZIER,
+                              color=mscreen.COLOR_RED)
+mscreen.getSceneManager().layer = None
+mscreen.save(PATH)
+
+# ...on a later session, the whole scene loads straight from the file
+mscreen.clear()
+mscreen.load(PATH)
+mscreen.refresh()
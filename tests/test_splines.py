@@ -0,0 +1,32 @@
+import math
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_CVS = 199  # (3n + 1 for cubic beziers)
+CVS = [(i * 0.25, math.sin(i * 0.5) * 2.0, math.cos(i * 0.25) * 2.0)
+       for i in range(NUM_CVS)]
+
+# draw cage
+mscreen.drawCurve(CVS, color=mscreen.COLOR_DARKGRAY, width=1)
+
+# draw the same control points as different kinds of piecewise curves
+bezier = mscreen.drawCurve(CVS, degree=mscreen.CURVE_CUBIC_BEZIER,
+                           color=mscreen.COLOR_LIGHTBLUE)
+catmull = mscreen.drawCurve(CVS, degree=mscreen.CURVE_CATMULLROM,
+                            color=mscreen.COLOR_LIGHTGREEN)
+bspline = mscreen.drawCurve(CVS, degree=mscreen.CURVE_BSPLINE,
+                            color=mscreen.COLOR_LIGHTRED)
+
+
+# moving a single control point only re-tessellates the spans around it
+def wiggle(curve, index=NUM_CVS // 2, state={'t': 0.0}):
+    state['t'] += 0.1
+    x, y, z = CVS[index]
+    curve.setPoint(index, (x, y + math.sin(state['t']) * 5.0, z))
+    return True
+
+for each in (bezier, catmull, bspline):
+    each.registerCallback(wiggle)
+
+mscreen.refresh()
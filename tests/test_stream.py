@@ -0,0 +1,34 @@
+import math
+import time
+import threading
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_POINTS = 10000
+FRAMES = 300
+
+# primitives streamed from "outside" (a thread standing in for an external
+# solver) land on the "solver" layer
+server = mscreen.listen(layer="solver")
+
+
+def producer(address):
+    writer = mscreen.StreamWriter.connect(address)
+    trail = [(0.0, 0.0, 0.0)]
+    writer.update(2, trail, color=mscreen.COLOR_RED, size=3,
+                  kind=mscreen.STREAM_LINES)
+    for frame in range(FRAMES):
+        t = frame * 0.05
+        points = [(i * 0.01 - 50.0, math.sin(i * 0.01 + t) * 5.0,
+                   math.cos(i * 0.02 + t) * 5.0) for i in range(NUM_POINTS)]
+        writer.update(1, points, color=mscreen.COLOR_DARKCYAN, size=2)
+        writer.append(2, [(t, math.sin(t) * 10.0, 0.0)],
+                      kind=mscreen.STREAM_LINES)
+        time.sleep(1.0 / 24)
+    writer.erase(1)
+    writer.close()
+
+thread = threading.Thread(target=producer, args=(server.address,))
+thread.daemon = True
+thread.start()
@@ -0,0 +1,80 @@
+# Runs outside of Maya (plain Python): corrupt or truncated stream messages
+# get logged and the stream disconnected, without killing anything else.
+import os
+import time
+import logging
+import mscreen
+
+
+class Errors(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = list()
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+errors = Errors()
+mscreen.logger.addHandler(errors)
+
+
+def feed(data):
+    # streams `data` through a pipe, waiting until it gets disconnected
+    scene = mscreen.SceneManager()
+    rfd, wfd = os.pipe()
+    receiver = scene.stream(rfd)
+    os.write(wfd, data)
+    os.close(wfd)
+    for i in range(200):
+        if not receiver.isAlive:
+            break
+        time.sleep(0.01)
+    assert not receiver.isAlive
+    scene.draw()
+    return scene
+
+
+class Buffer(object):
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+buffer = Buffer()
+mscreen.StreamWriter(buffer).update(1, [(0, 0, 0), (1, 1, 1)])
+frame = buffer.data
+
+# a whole message makes it through
+assert len(feed(frame).primitives) == 1 and not errors.messages
+
+# the connection drops in the middle of a message
+feed(frame[:-8])
+assert "Truncated stream message" in errors.messages[-1]
+
+# the message is complete but its arrays block lies about its size
+header = mscreen._STREAM_HEADER
+magic, op, kind, handle, length = header.unpack(frame[:header.size])
+payload = frame[header.size:-16]
+feed(header.pack(magic, op, kind, handle, len(payload)) + payload)
+assert "Truncated mscreen array" in errors.messages[-1]
+
+# garbage
+feed(b"\x00" * 64)
+assert "Invalid stream message" in errors.messages[-1]
+
+# empty per point arrays are sent as they are (there are no points)
+buffer = Buffer()
+mscreen.StreamWriter(buffer).update(2, [], colors=[], sizes=[], size=[])
+count = len(errors.messages)
+assert len(feed(buffer.data).primitives) == 1
+assert len(errors.messages) == count
+
+# per point arrays not matching the points skip the message
+buffer = Buffer()
+mscreen.StreamWriter(buffer).update(3, [(0, 0, 0), (1, 1, 1)],
+                                    colors=[(1, 0, 0)] * 3)
+feed(buffer.data)
+assert "Invalid stream message (3)" in errors.messages[-1]
+
+print("\n".join(errors.messages))
@@ -0,0 +1,28 @@
+import random
+import mscreen
+reload(mscreen)  # debugging purposes
+
+
+NUM_CVS = 12
+CVS = [(random.randint(-10, 10), random.randint(0, 20),
+        random.randint(-10, 10)) for _ in range(NUM_CVS)]
+
+# same curve, tessellated with a fixed number of samples per span...
+fixed = mscreen.drawCurve(CVS, degree=mscreen.CURVE_CATMULLROM,
+                          color=mscreen.COLOR_DARKGRAY)
+
+# ...keeping it within a given distance (world units) of the actual curve...
+flat = mscreen.drawCurve(CVS, degree=mscreen.CURVE_CATMULLROM,
+                         color=mscreen.COLOR_LIGHTGREEN)
+flat.tessellation = mscreen.TESSELLATE_FLATNESS
+flat.tolerance = 0.05
+flat.move(y=1)
+
+# ...or according to its size on screen (try dollying the camera around)
+screen = mscreen.drawCurve(CVS, degree=mscreen.CURVE_CATMULLROM,
+                           color=mscreen.COLOR_LIGHTBLUE)
+screen.tessellation = mscreen.TESSELLATE_SCREEN
+screen.pixelLength = 10
+screen.move(y=2)
+
+mscreen.refresh()